@@ -15,6 +15,88 @@ TELEGRAM_REGISTER_URL = f"{BACKEND_BASE_URL}/telegram/register"
 TELEGRAM_STATUS_URL = f"{BACKEND_BASE_URL}/telegram/status"
 TELEGRAM_SET_LANGUAGE_URL = f"{BACKEND_BASE_URL}/telegram/set-language"
 
+RPC_POOL_MAX_CONNECTIONS = int(os.getenv("RPC_POOL_MAX_CONNECTIONS", "100"))
+RPC_POOL_MAX_KEEPALIVE = int(os.getenv("RPC_POOL_MAX_KEEPALIVE", "20"))
+RPC_KEEPALIVE_EXPIRY = float(os.getenv("RPC_KEEPALIVE_EXPIRY", "30"))
+RPC_POOL_TIMEOUT = float(os.getenv("RPC_POOL_TIMEOUT", "5"))
+RPC_HTTP2 = os.getenv("RPC_HTTP2", "").lower() in {"1", "true", "yes"}
+RPC_JSON_CODEC = os.getenv("RPC_JSON_CODEC", "auto")
+# Ответы бэкенда запрашиваются сжатыми: Accept-Encoding выставляет httpx (gzip, deflate, br — если установлен brotli).
+RPC_RESPONSE_COMPRESSION = os.getenv("RPC_RESPONSE_COMPRESSION", "1").lower() in {"1", "true", "yes"}
+# Тела запросов больше RPC_COMPRESS_MIN_BYTES сжимаются gzip — бэкенд должен понимать Content-Encoding.
+RPC_COMPRESS_REQUESTS = os.getenv("RPC_COMPRESS_REQUESTS", "").lower() in {"1", "true", "yes"}
+RPC_COMPRESS_MIN_BYTES = int(os.getenv("RPC_COMPRESS_MIN_BYTES", "1024"))
+
+RPC_RETRY_ATTEMPTS = int(os.getenv("RPC_RETRY_ATTEMPTS", "2"))
+RPC_RETRY_BASE_DELAY = float(os.getenv("RPC_RETRY_BASE_DELAY", "0.2"))
+RPC_RETRY_MAX_DELAY = float(os.getenv("RPC_RETRY_MAX_DELAY", "3"))
+RPC_RETRY_BUDGET_RATIO = float(os.getenv("RPC_RETRY_BUDGET_RATIO", "0.1"))
+RPC_RETRY_MAX_AFTER = float(os.getenv("RPC_RETRY_MAX_AFTER", "5"))
+
+RPC_HEDGE_ENABLED = os.getenv("RPC_HEDGE_ENABLED", "").lower() in {"1", "true", "yes"}
+RPC_HEDGE_PERCENTILE = float(os.getenv("RPC_HEDGE_PERCENTILE", "0.95"))
+RPC_HEDGE_MIN_DELAY = float(os.getenv("RPC_HEDGE_MIN_DELAY", "0.05"))
+RPC_HEDGE_MIN_SAMPLES = int(os.getenv("RPC_HEDGE_MIN_SAMPLES", "20"))
+
+RPC_CACHE_TTL = float(os.getenv("RPC_CACHE_TTL", "30"))
+RPC_CACHE_MAX_USERS = int(os.getenv("RPC_CACHE_MAX_USERS", "10000"))
+
+# Пауза после неудачного telegram.status: для пользователя — сразу, для всех — после
+# RPC_STATUS_BACKOFF_GLOBAL_AFTER неудач подряд; растёт вдвое до RPC_STATUS_BACKOFF_MAX.
+RPC_STATUS_BACKOFF_BASE = float(os.getenv("RPC_STATUS_BACKOFF_BASE", "1"))
+RPC_STATUS_BACKOFF_MAX = float(os.getenv("RPC_STATUS_BACKOFF_MAX", "30"))
+RPC_STATUS_BACKOFF_GLOBAL_AFTER = int(os.getenv("RPC_STATUS_BACKOFF_GLOBAL_AFTER", "3"))
+
+RPC_BREAKER_FAILURE_RATE = float(os.getenv("RPC_BREAKER_FAILURE_RATE", "0.5"))
+RPC_BREAKER_WINDOW = int(os.getenv("RPC_BREAKER_WINDOW", "20"))
+RPC_BREAKER_MIN_CALLS = int(os.getenv("RPC_BREAKER_MIN_CALLS", "10"))
+RPC_BREAKER_COOLDOWN = float(os.getenv("RPC_BREAKER_COOLDOWN", "15"))
+
+# ai.* через задания бэкенда (job.submit + опрос job.get) вместо долгого запроса.
+RPC_JOBS_ENABLED = os.getenv("RPC_JOBS_ENABLED", "1").lower() in {"1", "true", "yes"}
+RPC_JOB_POLL_INTERVAL = float(os.getenv("RPC_JOB_POLL_INTERVAL", "0.5"))
+RPC_JOB_POLL_MAX_INTERVAL = float(os.getenv("RPC_JOB_POLL_MAX_INTERVAL", "3"))
+RPC_JOB_TIMEOUT = float(os.getenv("RPC_JOB_TIMEOUT", "90"))
+
+# Ограничение нагрузки на бэкенд; 0 отключает соответствующий лимит.
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "64"))
+RPC_AI_CONCURRENCY = int(os.getenv("RPC_AI_CONCURRENCY", "8"))
+RPC_READ_CONCURRENCY = int(os.getenv("RPC_READ_CONCURRENCY", "48"))
+RPC_WRITE_CONCURRENCY = int(os.getenv("RPC_WRITE_CONCURRENCY", "16"))
+RPC_QUEUE_MAX = int(os.getenv("RPC_QUEUE_MAX", "256"))
+RPC_QUEUE_TIMEOUT = float(os.getenv("RPC_QUEUE_TIMEOUT", "5"))
+RPC_USER_RATE = float(os.getenv("RPC_USER_RATE", "5"))
+RPC_USER_BURST = float(os.getenv("RPC_USER_BURST", "10"))
+
+# Локальная очередь записей (расходы, доходы, пополнения) на время недоступности бэкенда.
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "1").lower() in {"1", "true", "yes"}
+OUTBOX_REPLAY_INTERVAL = float(os.getenv("OUTBOX_REPLAY_INTERVAL", "5"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "60"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+# Сколько раз запись может не дойти, пока остальные доходят, прежде чем она станет failed.
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+
+# Антифлуд: жетонов в секунду и размер пачки на пользователя, отдельно для сообщений и кнопок; 0 — без ограничения.
+THROTTLE_MESSAGE_RATE = float(os.getenv("THROTTLE_MESSAGE_RATE", "1"))
+THROTTLE_MESSAGE_BURST = float(os.getenv("THROTTLE_MESSAGE_BURST", "5"))
+THROTTLE_CALLBACK_RATE = float(os.getenv("THROTTLE_CALLBACK_RATE", "2"))
+THROTTLE_CALLBACK_BURST = float(os.getenv("THROTTLE_CALLBACK_BURST", "6"))
+THROTTLE_MAX_USERS = int(os.getenv("THROTTLE_MAX_USERS", "200000"))
+
+# Сколько секунд доверять сохранённой регистрации, прежде чем перепроверить её в фоне; 0 — проверять на каждом апдейте.
+REGISTRATION_TTL = float(os.getenv("REGISTRATION_TTL", "300"))
+
+# Мягкий TTL языка и валюты: старше — отдаются из хранилища, а в фоне обновляются из бэкенда.
+PROFILE_REFRESH_TTL = float(os.getenv("PROFILE_REFRESH_TTL", "300"))
+
+# Бюджет времени на обработку одного апдейта (секунды), включая все вызовы бэкенда.
+UPDATE_DEADLINE = float(os.getenv("UPDATE_DEADLINE", "10"))
+# Апдейты дольше порога (секунды) пишутся в лог с разбивкой по стадиям; 0 — не писать.
+SLOW_UPDATE_THRESHOLD = float(os.getenv("SLOW_UPDATE_THRESHOLD", "1"))
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
 
 def validate_config() -> None:
     missing = []
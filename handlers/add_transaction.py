@@ -7,7 +7,8 @@ from states.transactions import TransactionStates
 from keyboards.keyboards import cancel_button, back_button
 from keyboards.expense_categories import expense_category_keyboard
 from utils.categories import EXPENSE_CATEGORY_KEYS, expense_category_label, expense_category_backend_value
-from rpc import rpc
+from outbox import rpc_or_enqueue
+from rpc import new_idempotency_key, RPCOverloadedError
 from ui.menus import get_main_menu
 from utils.ui import parse_amount, format_amount, format_date, safe_html_text, escape_html
 from i18n import t
@@ -184,7 +185,7 @@ def confirm_keyboard(lang: str | None = None):
 
 async def prepare_confirmation(obj, state: FSMContext, date_value: str, lang: str | None = None, currency: dict | None = None):
     data = await state.get_data()
-    await state.update_data(date=date_value)
+    await state.update_data(date=date_value, idempotency_key=new_idempotency_key())
     await state.set_state(TransactionStates.waiting_for_confirm)
 
     amount_text = format_amount(data["amount"], currency=currency)
@@ -218,10 +219,14 @@ async def finish_expense(cb: types.CallbackQuery, state: FSMContext, lang: str |
             "datetime": date_value,
         }],
         "source": "manual",
+        "idempotency_key": data.get("idempotency_key") or new_idempotency_key(),
     }
 
     try:
-        await rpc("transaction.import", payload)
+        _, queued = await rpc_or_enqueue("transaction.import", payload)
+    except RPCOverloadedError:
+        # Экран подтверждения остаётся: повторное нажатие уйдёт с тем же idempotency_key.
+        return await cb.answer(t("common.rate_limited", lang), show_alert=True)
     except Exception:
         await state.clear()
         return await safe_edit_text(
@@ -237,7 +242,7 @@ async def finish_expense(cb: types.CallbackQuery, state: FSMContext, lang: str |
         message_id=data["bot_message_id"],
         text=(
             f"{t('expense.save.success', lang, amount=escape_html(format_amount(data['amount'], currency=currency)), category=safe_html_text(data.get('category_label') or data.get('category_value'), 80), date=escape_html(format_date(date_value)))}"
-            f"\n{t('expense.save.success.footer', lang)}"
+            f"\n{t('common.sync_pending' if queued else 'expense.save.success.footer', lang)}"
         ),
         reply_markup=await get_main_menu(cb.from_user.id, lang, bootstrap={"has_transactions": True})
     )
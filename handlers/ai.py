@@ -1,49 +1,57 @@
 # handlers/ai.py
 from aiogram import Router, types, F
 
-from rpc import rpc, RPCError, RPCTransportError
+from rpc import rpc_job, RPCError, RPCTransportError
 from keyboards.keyboards import back_button
 from ui.formatting import header
 from i18n import t
+from utils.background import spawn
 from utils.telegram import safe_edit_text
 from utils.ui import safe_html_text
 
 router = Router()
 
 
-# Legacy callback kept for backward compatibility with older inline messages.
-# The current main menu routes users through the Insights section instead.
-@router.callback_query(F.data == "menu_daily")
-async def ai_daily(cb: types.CallbackQuery, lang: str | None = None):
+async def _send_daily(message: types.Message, tg_user_id: int, lang: str | None = None):
     try:
-        res = await rpc("ai.insight.daily", {
-            "tg_user_id": cb.from_user.id
+        res = await rpc_job("ai.insight.daily", {
+            "tg_user_id": tg_user_id
         })
     except RPCTransportError:
         await safe_edit_text(
-            cb.message,
+            message,
             t("ai.daily.error.service_unavailable", lang),
             reply_markup=back_button(lang)
         )
-        return await cb.answer()
+        return
     except RPCError:
         await safe_edit_text(
-            cb.message,
+            message,
             t("ai.daily.error.failed", lang),
             reply_markup=back_button(lang)
         )
-        return await cb.answer()
+        return
 
     insight = res.get("insight")
     if not insight:
         await safe_edit_text(
-            cb.message,
+            message,
             t("ai.daily.error.unavailable", lang),
             reply_markup=back_button(lang)
         )
-        return await cb.answer()
+        return
 
     text = header(t("ai.daily.title", lang), "tip") + "\n\n" + safe_html_text(insight, 600)
-    await safe_edit_text(cb.message, text, reply_markup=back_button(lang))
+    await safe_edit_text(message, text, reply_markup=back_button(lang))
+
+
+# Legacy callback kept for backward compatibility with older inline messages.
+# The current main menu routes users through the Insights section instead.
+@router.callback_query(F.data == "menu_daily")
+async def ai_daily(cb: types.CallbackQuery, lang: str | None = None):
+    await safe_edit_text(
+        cb.message,
+        header(t("ai.daily.title", lang), "tip") + "\n\n" + t("insights.tip.loading", lang),
+    )
     await cb.answer()
-    return None
+    spawn(_send_daily(cb.message, cb.from_user.id, lang), name="ai_daily")
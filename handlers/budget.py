@@ -7,7 +7,7 @@ from ui.formatting import header, money_line
 from i18n import t
 from utils.dates import current_month
 from utils.telegram import safe_edit_text
-from utils.ui import escape_html, to_float
+from utils.ui import escape_html
 
 router = Router()
 
@@ -34,19 +34,16 @@ async def show_budget(cb: types.CallbackQuery, lang: str | None = None, currency
         )
         return await cb.answer()
 
-    income = to_float(budget.get("income", 0))
-    expenses = to_float(budget.get("expenses", 0))
-    daily_limit = to_float(budget.get("recommended_daily_limit", 0))
-    budget_currency = budget.get("currency") or currency
+    budget_currency = budget.currency or currency
 
     text = (
-        header(t("budget.title", lang, month=escape_html(budget.get("month") or current_month())), "budget")
+        header(t("budget.title", lang, month=escape_html(budget.month or current_month())), "budget")
         + "\n\n"
-        + money_line(t("label.budget_incomes", lang), income, "income", currency=budget_currency)
+        + money_line(t("label.budget_incomes", lang), budget.income, "income", currency=budget_currency)
         + "\n"
-        + money_line(t("label.budget_expenses", lang), expenses, "expense", currency=budget_currency)
+        + money_line(t("label.budget_expenses", lang), budget.expenses, "expense", currency=budget_currency)
         + "\n"
-        + money_line(t("label.daily_limit", lang), daily_limit, "progress", currency=budget_currency)
+        + money_line(t("label.daily_limit", lang), budget.recommended_daily_limit, "progress", currency=budget_currency)
         + "\n\n"
         + t("budget.footer", lang)
     )
@@ -1,9 +1,10 @@
 from aiogram import Router, types, F
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from rpc import rpc, RPCError, RPCTransportError
+from rpc import rpc_job, RPCError, RPCTransportError
 from keyboards.keyboards import back_button
 from i18n import t
+from utils.background import spawn
 from utils.telegram import safe_edit_text
 from utils.ui import safe_html_text, to_float
 
@@ -17,28 +18,22 @@ def back_to_goal_keyboard(goal_id: int, lang: str | None = None):
     return kb.as_markup()
 
 
-@router.callback_query(F.data.startswith("analyze_goal_"))
-async def analyze_goal(cb: types.CallbackQuery, lang: str | None = None):
-    goal_id = int(cb.data.split("_")[-1])
-    user_id = cb.from_user.id
-
-    await cb.answer(t("goals.analysis.loading", lang))
-
+async def _send_goal_analysis(message: types.Message, tg_user_id: int, goal_id: int, lang: str | None = None):
     try:
-        ai = await rpc("ai.goal.analysis", {
-            "tg_user_id": user_id,
+        ai = await rpc_job("ai.goal.analysis", {
+            "tg_user_id": tg_user_id,
             "goal_id": goal_id
         })
     except RPCTransportError:
         await safe_edit_text(
-            cb.message,
+            message,
             t("goals.analysis.error.service_unavailable", lang),
             reply_markup=back_button(lang)
         )
         return
     except RPCError:
         await safe_edit_text(
-            cb.message,
+            message,
             t("goals.analysis.error.failed", lang),
             reply_markup=back_button(lang)
         )
@@ -67,4 +62,14 @@ async def analyze_goal(cb: types.CallbackQuery, lang: str | None = None):
         f"{score_text}"
     )
 
-    await safe_edit_text(cb.message, text, reply_markup=back_to_goal_keyboard(goal_id, lang))
+    await safe_edit_text(message, text, reply_markup=back_to_goal_keyboard(goal_id, lang))
+
+
+@router.callback_query(F.data.startswith("analyze_goal_"))
+async def analyze_goal(cb: types.CallbackQuery, lang: str | None = None):
+    goal_id = int(cb.data.split("_")[-1])
+
+    await cb.answer(t("goals.analysis.loading", lang))
+    # Результат придёт в фоне и заменит заглушку; хендлер не ждёт ИИ.
+    await safe_edit_text(cb.message, f"{t('goals.analysis.title', lang)}\n\n{t('goals.analysis.loading', lang)}")
+    spawn(_send_goal_analysis(cb.message, cb.from_user.id, goal_id, lang), name="goal_analysis")
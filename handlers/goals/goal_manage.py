@@ -4,11 +4,13 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from rpc import rpc, RPCError, RPCTransportError
+from models import Goal
+from outbox import rpc_or_enqueue
+from rpc import rpc, new_idempotency_key, RPCError, RPCOverloadedError, RPCTransportError
 from keyboards.goals_manage import goals_list_keyboard, goal_manage_keyboard
 from states.goals import DepositGoal
 from ui.menus import get_main_menu
-from utils.ui import format_amount, format_date, normalize_currency, parse_amount, safe_html_text, to_float
+from utils.ui import format_amount, format_date, normalize_currency, parse_amount, safe_html_text
 from ui.formatting import SEPARATOR
 from i18n import t
 from utils.telegram import safe_edit_text, safe_edit_message_text
@@ -45,18 +47,28 @@ async def _show_goal_unavailable(cb: types.CallbackQuery, lang: str | None = Non
     await menu_goals(cb, lang=lang)
 
 
-def _goal_percent(goal: dict) -> tuple[float, float, int]:
-    total = to_float(goal.get("amount_total", 0))
-    saved = to_float(goal.get("amount_saved", 0))
-    percent = int(saved / total * 100) if total else 0
-    return total, saved, percent
+def _goal_text(goal: Goal, lang: str | None = None, currency: dict | None = None) -> str:
+    percent = goal.percent
+    bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
+    goal_currency = goal.currency or currency
+
+    return (
+        f"{goal.icon} <b>{safe_html_text(goal.title or '—', 120)}</b>\n\n"
+        f"💰 {format_amount(goal.amount_saved, currency=goal_currency)} / {format_amount(goal.amount_total, currency=goal_currency)}\n"
+        f"📈 {t('label.progress', lang)}: <b>{percent}%</b>\n"
+        f"{bar}\n"
+        f"{SEPARATOR}\n"
+        f"{t('goals.detail.primary', lang)}: {t('common.yes', lang) if goal.is_primary else t('common.no', lang)}\n"
+        f"{t('goals.detail.priority', lang)}: {goal.priority}\n"
+        f"{t('goals.detail.deadline', lang)}: {format_date(goal.deadline or '—')}\n"
+    )
 
 
 @router.callback_query(F.data == "menu_goals")
 async def menu_goals(cb: types.CallbackQuery, lang: str | None = None):
     user_id = cb.from_user.id
     try:
-        result = await rpc("goal.list", {"tg_user_id": user_id})
+        goals = await rpc("goal.list", {"tg_user_id": user_id})
     except (RPCError, RPCTransportError):
         await safe_edit_text(
             cb.message,
@@ -65,9 +77,6 @@ async def menu_goals(cb: types.CallbackQuery, lang: str | None = None):
         )
         return await cb.answer()
 
-    res = result.get("result") or result
-    goals = res.get("goals", [])
-
     if not goals:
         kb = InlineKeyboardBuilder()
         kb.button(text=t("goals.menu.create_button", lang), callback_data="menu_newgoal")
@@ -100,38 +109,14 @@ async def goal_manage(cb: types.CallbackQuery, state: FSMContext, lang: str | No
     await state.clear()
 
     try:
-        result = await rpc("goal.get", {"tg_user_id": user_id, "goal_id": goal_id})
+        goal = await rpc("goal.get", {"tg_user_id": user_id, "goal_id": goal_id})
     except (RPCError, RPCTransportError):
         return await _show_goal_unavailable(cb, lang)
 
-    goal = result.get("result") or result
-
-    icon = goal.get("icon", "🎯")
-    title = safe_html_text(goal.get("title") or "—", 120)
-    total, saved, percent = _goal_percent(goal)
-
-    bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
-
-    is_primary = goal.get("is_primary", False)
-    pr = goal.get("priority", 1)
-    status = goal.get("status", "active")
-    deadline = goal.get("deadline") or "—"
-
-    text = (
-        f"{icon} <b>{title}</b>\n\n"
-        f"💰 {format_amount(saved, currency=goal.get('currency') or currency)} / {format_amount(total, currency=goal.get('currency') or currency)}\n"
-        f"📈 {t('label.progress', lang)}: <b>{percent}%</b>\n"
-        f"{bar}\n"
-        f"{SEPARATOR}\n"
-        f"{t('goals.detail.primary', lang)}: {t('common.yes', lang) if is_primary else t('common.no', lang)}\n"
-        f"{t('goals.detail.priority', lang)}: {pr}\n"
-        f"{t('goals.detail.deadline', lang)}: {format_date(deadline)}\n"
-    )
-
     await safe_edit_text(
         cb.message,
-        text,
-        reply_markup=goal_manage_keyboard(goal_id, is_primary, status, lang)
+        _goal_text(goal, lang, currency),
+        reply_markup=goal_manage_keyboard(goal_id, goal.is_primary, goal.status, lang)
     )
     await cb.answer()
 
@@ -191,9 +176,8 @@ async def deposit_start(cb: types.CallbackQuery, state: FSMContext, lang: str |
         return await _show_goal_unavailable(cb, lang)
 
     try:
-        result = await rpc("goal.get", {"tg_user_id": cb.from_user.id, "goal_id": goal_id})
-        goal = result.get("result") or result
-        goal_currency = goal.get("currency") or currency
+        goal = await rpc("goal.get", {"tg_user_id": cb.from_user.id, "goal_id": goal_id})
+        goal_currency = goal.currency or currency
     except (RPCError, RPCTransportError):
         return await _show_goal_unavailable(cb, lang)
 
@@ -280,7 +264,7 @@ async def deposit_amount_handler(message: types.Message, state: FSMContext, lang
     except Exception:
         pass
 
-    await state.update_data(amount=amount)
+    await state.update_data(amount=amount, idempotency_key=new_idempotency_key())
     await state.set_state(DepositGoal.waiting_for_confirm)
 
     bot_msg_id = data.get("bot_message_id")
@@ -301,64 +285,55 @@ async def deposit_amount_handler(message: types.Message, state: FSMContext, lang
 
 
 @router.callback_query(DepositGoal.waiting_for_confirm, F.data.regexp(r"^goal_deposit_confirm_\d+$"))
-async def deposit_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str | None = None):
+async def deposit_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str | None = None, currency: dict | None = None):
     data = await state.get_data()
     goal_id = data["goal_id"]
     amount = data["amount"]
 
     try:
-        result = await rpc("goal.deposit", {
+        result, queued = await rpc_or_enqueue("goal.deposit", {
             "tg_user_id": cb.from_user.id,
             "goal_id": goal_id,
             "amount": amount,
-            "method": "manual"
+            "method": "manual",
+            "idempotency_key": data.get("idempotency_key") or new_idempotency_key(),
         })
+    except RPCOverloadedError:
+        # Экран подтверждения остаётся: повторное нажатие уйдёт с тем же idempotency_key.
+        return await cb.answer(t("common.rate_limited", lang), show_alert=True)
     except (RPCError, RPCTransportError):
         await state.clear()
         return await _show_goal_unavailable(cb, lang)
 
     await state.clear()
+    if queued:
+        await safe_edit_text(
+            cb.message,
+            f"{t('goals.manage.deposit_saved', lang)}: <b>{format_amount(amount, currency=data.get('goal_currency') or currency)}</b>\n\n{t('common.sync_pending', lang)}",
+            reply_markup=deposit_input_keyboard(goal_id, lang),
+        )
+        return await cb.answer()
+
     await cb.answer(t("goals.manage.deposit_saved", lang))
     await render_goal(cb, goal_id, rpc_result=result, lang=lang)
 
 
-async def render_goal(event: types.Message | types.CallbackQuery, goal_id: int, rpc_result=None, lang: str | None = None, currency: dict | None = None):
+async def render_goal(event: types.Message | types.CallbackQuery, goal_id: int, rpc_result: Goal | None = None, lang: str | None = None, currency: dict | None = None):
     user_id = event.from_user.id
 
-    if rpc_result:
-        goal = rpc_result.get("result") or rpc_result
+    if rpc_result is not None:
+        goal = rpc_result
     else:
         try:
-            result = await rpc("goal.get", {"tg_user_id": user_id, "goal_id": goal_id})
-            goal = result.get("result") or result
+            goal = await rpc("goal.get", {"tg_user_id": user_id, "goal_id": goal_id})
         except (RPCError, RPCTransportError):
             if isinstance(event, types.CallbackQuery):
                 return await _show_goal_unavailable(event, lang)
             await event.answer(t("goals.manage.load_error", lang))
             return None
 
-    icon = goal.get("icon", "🎯")
-    title = safe_html_text(goal.get("title") or "—", 120)
-    total, saved, percent = _goal_percent(goal)
-    bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
-
-    is_primary = goal.get("is_primary", False)
-    pr = goal.get("priority", 1)
-    status = goal.get("status", "active")
-    deadline = goal.get("deadline") or "—"
-
-    text = (
-        f"{icon} <b>{title}</b>\n\n"
-        f"💰 {format_amount(saved, currency=goal.get('currency') or currency)} / {format_amount(total, currency=goal.get('currency') or currency)}\n"
-        f"📈 {t('label.progress', lang)}: <b>{percent}%</b>\n"
-        f"{bar}\n"
-        f"{SEPARATOR}\n"
-        f"{t('goals.detail.primary', lang)}: {t('common.yes', lang) if is_primary else t('common.no', lang)}\n"
-        f"{t('goals.detail.priority', lang)}: {pr}\n"
-        f"{t('goals.detail.deadline', lang)}: {format_date(deadline)}\n"
-    )
-
-    markup = goal_manage_keyboard(goal_id, is_primary, status, lang)
+    text = _goal_text(goal, lang, currency)
+    markup = goal_manage_keyboard(goal_id, goal.is_primary, goal.status, lang)
 
     # Если это callback
     if isinstance(event, types.CallbackQuery):
@@ -1,11 +1,12 @@
 # handlers/insights.py
 from aiogram import Router, types, F
 
-from rpc import rpc, RPCError, RPCTransportError
+from rpc import rpc, rpc_job, RPCError, RPCTransportError
 from keyboards.keyboards import insights_menu
 from ui.formatting import header, money_line, SEPARATOR
-from utils.ui import safe_html_text, to_float
+from utils.ui import currency_code, safe_html_text
 from i18n import t
+from utils.background import spawn
 from utils.telegram import safe_edit_text
 
 router = Router()
@@ -22,72 +23,58 @@ async def menu_insights(cb: types.CallbackQuery, lang: str | None = None):
     await cb.answer()
 
 
-@router.callback_query(F.data == "insights_week")
-async def insights_week(cb: types.CallbackQuery, lang: str | None = None):
-    await cb.answer(t("insights.week.loading", lang))
+async def _send_transaction_analysis(message: types.Message, tg_user_id: int, days: int, kind: str, lang: str | None = None):
     try:
-        res = await rpc("ai.transaction.analysis", {
-            "tg_user_id": cb.from_user.id,
-            "days": 7,
+        res = await rpc_job("ai.transaction.analysis", {
+            "tg_user_id": tg_user_id,
+            "days": days,
         })
     except (RPCError, RPCTransportError):
         await safe_edit_text(
-            cb.message,
-            t("insights.week.error", lang),
+            message,
+            t(f"insights.{kind}.error", lang),
             reply_markup=insights_menu(lang)
         )
-        return await cb.answer()
+        return
 
-    summary = safe_html_text(res.get("summary") or t("insights.week.empty", lang), 600)
+    summary = safe_html_text(res.get("summary") or t(f"insights.{kind}.empty", lang), 600)
     recommendation = safe_html_text(res.get("recommendation") or "", 300)
 
     text = (
-        header(t("insights.week.title", lang), "insights")
+        header(t(f"insights.{kind}.title", lang), "insights")
         + "\n\n"
         + summary
     )
     if recommendation:
         text += "\n\n" + header(t("insights.week.recommendation_title", lang), "tip") + "\n" + recommendation
 
-    await safe_edit_text(cb.message, text, reply_markup=insights_menu(lang))
-    await cb.answer()
+    await safe_edit_text(message, text, reply_markup=insights_menu(lang))
 
 
-@router.callback_query(F.data == "insights_trend")
-async def insights_trend(cb: types.CallbackQuery, lang: str | None = None):
-    await cb.answer(t("insights.trend.loading", lang))
-    try:
-        res = await rpc("ai.transaction.analysis", {
-            "tg_user_id": cb.from_user.id,
-            "days": 30,
-        })
-    except (RPCError, RPCTransportError):
-        await safe_edit_text(
-            cb.message,
-            t("insights.trend.error", lang),
-            reply_markup=insights_menu(lang)
-        )
-        return await cb.answer()
+async def _start_transaction_analysis(cb: types.CallbackQuery, days: int, kind: str, lang: str | None = None):
+    await cb.answer(t(f"insights.{kind}.loading", lang))
+    # Ответ ИИ приходит в фоне и заменяет заглушку; хендлер не держит апдейт.
+    await safe_edit_text(
+        cb.message,
+        header(t(f"insights.{kind}.title", lang), "insights") + "\n\n" + t(f"insights.{kind}.loading", lang),
+    )
+    spawn(_send_transaction_analysis(cb.message, cb.from_user.id, days, kind, lang), name=f"insights_{kind}")
 
-    summary = safe_html_text(res.get("summary") or t("insights.trend.empty", lang), 600)
-    recommendation = safe_html_text(res.get("recommendation") or "", 300)
 
-    text = (
-        header(t("insights.trend.title", lang), "insights")
-        + "\n\n"
-        + summary
-    )
-    if recommendation:
-        text += "\n\n" + header(t("insights.week.recommendation_title", lang), "tip") + "\n" + recommendation
+@router.callback_query(F.data == "insights_week")
+async def insights_week(cb: types.CallbackQuery, lang: str | None = None):
+    await _start_transaction_analysis(cb, 7, "week", lang)
 
-    await safe_edit_text(cb.message, text, reply_markup=insights_menu(lang))
-    await cb.answer()
+
+@router.callback_query(F.data == "insights_trend")
+async def insights_trend(cb: types.CallbackQuery, lang: str | None = None):
+    await _start_transaction_analysis(cb, 30, "trend", lang)
 
 
 @router.callback_query(F.data == "insights_savings")
 async def insights_savings(cb: types.CallbackQuery, lang: str | None = None, currency: dict | None = None):
     try:
-        res = await rpc("goal.list", {"tg_user_id": cb.from_user.id})
+        goals = await rpc("goal.list", {"tg_user_id": cb.from_user.id})
     except (RPCError, RPCTransportError):
         await safe_edit_text(
             cb.message,
@@ -96,7 +83,6 @@ async def insights_savings(cb: types.CallbackQuery, lang: str | None = None, cur
         )
         return await cb.answer()
 
-    goals = res.get("goals", [])
     if not goals:
         await safe_edit_text(
             cb.message,
@@ -109,15 +95,14 @@ async def insights_savings(cb: types.CallbackQuery, lang: str | None = None, cur
 
     grouped: dict[str, dict] = {}
     for goal in goals:
-        goal_currency = goal.get("currency") or currency
-        code = str((goal_currency or {}).get("code") or "UZS")
-        bucket = grouped.setdefault(code, {
+        goal_currency = goal.currency or currency
+        bucket = grouped.setdefault(currency_code(goal_currency), {
             "currency": goal_currency,
             "saved": 0.0,
             "target": 0.0,
         })
-        bucket["saved"] += to_float(goal.get("amount_saved") or 0)
-        bucket["target"] += to_float(goal.get("amount_total") or 0)
+        bucket["saved"] += goal.amount_saved
+        bucket["target"] += goal.amount_total
 
     lines = []
     for bucket in grouped.values():
@@ -139,20 +124,27 @@ async def insights_savings(cb: types.CallbackQuery, lang: str | None = None, cur
     await cb.answer()
 
 
-@router.callback_query(F.data == "insights_tip")
-async def insights_tip(cb: types.CallbackQuery, lang: str | None = None):
-    await cb.answer(t("insights.tip.loading", lang))
+async def _send_tip(message: types.Message, tg_user_id: int, lang: str | None = None):
     try:
-        res = await rpc("ai.insight.daily", {"tg_user_id": cb.from_user.id})
+        res = await rpc_job("ai.insight.daily", {"tg_user_id": tg_user_id})
     except (RPCError, RPCTransportError):
         await safe_edit_text(
-            cb.message,
+            message,
             t("insights.tip.error", lang),
             reply_markup=insights_menu(lang)
         )
-        return await cb.answer()
+        return
 
     insight = safe_html_text(res.get("insight") or t("insights.tip.empty", lang), 600)
     text = header(t("insights.tip.title", lang), "tip") + "\n\n" + insight
-    await safe_edit_text(cb.message, text, reply_markup=insights_menu(lang))
-    await cb.answer()
+    await safe_edit_text(message, text, reply_markup=insights_menu(lang))
+
+
+@router.callback_query(F.data == "insights_tip")
+async def insights_tip(cb: types.CallbackQuery, lang: str | None = None):
+    await cb.answer(t("insights.tip.loading", lang))
+    await safe_edit_text(
+        cb.message,
+        header(t("insights.tip.title", lang), "tip") + "\n\n" + t("insights.tip.loading", lang),
+    )
+    spawn(_send_tip(cb.message, cb.from_user.id, lang), name="insights_tip")
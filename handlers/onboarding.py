@@ -3,6 +3,7 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from models import DailyStats
 from states.onboarding import OnboardingStates
 from ui.menus import get_main_menu
 from ui.formatting import header, money_line, SEPARATOR
@@ -13,7 +14,6 @@ from handlers.add_transaction import add_start
 from i18n import t
 from utils.dates import today_iso
 from utils.telegram import safe_edit_text
-from utils.ui import to_float
 
 router = Router()
 
@@ -147,17 +147,14 @@ async def onboarding_finish(cb: types.CallbackQuery, state: FSMContext, lang: st
     try:
         daily = await rpc("transaction.getDaily", {"tg_user_id": cb.from_user.id, "date": today_iso()})
     except (RPCError, RPCTransportError):
-        daily = {}
-
-    income = to_float(daily.get("income", 0))
-    expense = to_float(daily.get("expense", 0))
-    balance = float(income) - float(expense)
+        daily = DailyStats()
 
+    daily_currency = daily.currency or currency
     lines = [
-        money_line(t("label.income", lang), income, "income", sign="+", currency=daily.get("currency") or currency),
-        money_line(t("label.expense", lang), expense, "expense", sign="-", currency=daily.get("currency") or currency),
+        money_line(t("label.income", lang), daily.income, "income", sign="+", currency=daily_currency),
+        money_line(t("label.expense", lang), daily.expense, "expense", sign="-", currency=daily_currency),
         SEPARATOR,
-        money_line(t("label.balance", lang), balance, "progress", currency=daily.get("currency") or currency),
+        money_line(t("label.balance", lang), daily.balance, "progress", currency=daily_currency),
     ]
 
     text = header(t("onboarding.finish.title", lang), "insights") + "\n\n" + "\n".join(lines)
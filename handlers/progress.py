@@ -3,7 +3,7 @@ from aiogram import Router, types, F
 
 from rpc import rpc, RPCError, RPCTransportError
 from keyboards.keyboards import back_button
-from utils.ui import format_amount, safe_html_text, to_float
+from utils.ui import format_amount, safe_html_text
 from ui.formatting import header, SEPARATOR
 from i18n import t
 from utils.telegram import safe_edit_text
@@ -16,7 +16,7 @@ async def menu_progress(cb: types.CallbackQuery, lang: str | None = None, curren
     user_id = cb.from_user.id
 
     try:
-        res = await rpc("goal.list", {"tg_user_id": user_id})
+        goals = await rpc("goal.list", {"tg_user_id": user_id})
     except (RPCError, RPCTransportError):
         await safe_edit_text(
             cb.message,
@@ -25,7 +25,6 @@ async def menu_progress(cb: types.CallbackQuery, lang: str | None = None, curren
         )
         return await cb.answer()
 
-    goals = res.get("goals", [])
     if not goals:
         await safe_edit_text(
             cb.message,
@@ -37,14 +36,10 @@ async def menu_progress(cb: types.CallbackQuery, lang: str | None = None, curren
     text = header(t("progress.title", lang), "insights") + "\n\n"
 
     for g in goals:
-        total = to_float(g.get("amount_total", 0))
-        saved = to_float(g.get("amount_saved", 0))
-        percent = int(saved / total * 100) if total else 0
-
         text += (
-            f"🎯 <b>{safe_html_text(g.get('title') or '—', 120)}</b>\n"
-            f"💰 {t('label.saved', lang)}: <b>{format_amount(saved, currency=g.get('currency') or currency)}</b> / {format_amount(total, currency=g.get('currency') or currency)}\n"
-            f"📈 {t('label.progress', lang)}: <b>{percent}%</b>\n"
+            f"🎯 <b>{safe_html_text(g.title or '—', 120)}</b>\n"
+            f"💰 {t('label.saved', lang)}: <b>{format_amount(g.amount_saved, currency=g.currency or currency)}</b> / {format_amount(g.amount_total, currency=g.currency or currency)}\n"
+            f"📈 {t('label.progress', lang)}: <b>{g.percent}%</b>\n"
             f"{SEPARATOR}\n"
         )
 
@@ -4,6 +4,7 @@ from aiogram.fsm.context import FSMContext
 import logging
 
 from i18n import t, normalize_lang, get_language_label
+from models import Currency
 from ui.menus import get_main_menu, get_user_flags
 from rpc import (
     telegram_set_language,
@@ -19,7 +20,7 @@ from storage.registration_store import store as registration_store
 from handlers.onboarding import start_onboarding
 from handlers.registration import send_registration_prompt
 from states.language_selection import LanguageSelection
-from utils.ui import currency_label, escape_html, normalize_currency
+from utils.ui import currency_code, currency_label, escape_html, normalize_currency
 from utils.telegram import safe_edit_text
 
 router = Router()
@@ -45,14 +46,13 @@ def language_keyboard(context: str, suggested: str | None = None, lang: str | No
     return kb.as_markup()
 
 
-def currency_keyboard(currencies: list[dict], current_code: str | None = None, lang: str | None = None):
+def currency_keyboard(currencies: tuple[Currency, ...], current_code: str | None = None, lang: str | None = None):
     kb = InlineKeyboardBuilder()
     for item in currencies:
-        code = str(item.get("code") or "").upper()
         label = currency_label(item)
-        if current_code and code == current_code:
+        if current_code and item.code == current_code:
             label = f"⭐ {label}"
-        kb.button(text=label, callback_data=f"currency_set_{code}")
+        kb.button(text=label, callback_data=f"currency_set_{item.code}")
     kb.button(text=t("common.back", lang), callback_data="menu_settings")
     kb.adjust(1)
     return kb.as_markup()
@@ -109,7 +109,7 @@ async def open_currency_settings(cb: types.CallbackQuery, lang: str | None = Non
         await cb.answer(t("settings.currency.load_failed", lang), show_alert=True)
         return
 
-    current_code = str((current or {}).get("code") or "").upper() or None
+    current_code = currency_code(current) if current else None
     text = (
         f"{t('settings.currency.title', lang)}\n\n"
         f"{t('settings.currency.prompt', lang)}"
@@ -126,7 +126,7 @@ async def open_currency_settings(cb: types.CallbackQuery, lang: str | None = Non
 
 
 @router.callback_query(F.data.startswith("lang_"))
-async def set_language(cb: types.CallbackQuery, state: FSMContext, lang: str | None = None):
+async def set_language(cb: types.CallbackQuery, state: FSMContext, lang: str | None = None, user_status=None):
     parts = cb.data.split("_")
     if len(parts) < 3:
         await cb.answer()
@@ -167,7 +167,7 @@ async def set_language(cb: types.CallbackQuery, state: FSMContext, lang: str | N
     )
 
     try:
-        status = await telegram_status(cb.from_user.id)
+        status = await user_status.get() if user_status else await telegram_status(cb.from_user.id)
         is_registered = status.get("registered")
     except RPCTransportError:
         is_registered = registration_store.is_registered(cb.from_user.id)
@@ -5,11 +5,12 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 import calendar
 import time
 
-from rpc import rpc, RPCError, RPCTransportError
+from models import Goal, SmartSaveResult
+from rpc import rpc, new_idempotency_key, RPCError, RPCTransportError
 from ui.menus import get_main_menu
 from ui.formatting import header, money_line, SEPARATOR
 from states.smart_save import SmartSaveFallback, SmartSaveConfirm
-from utils.ui import format_amount, safe_html_text, escape_html, to_float
+from utils.ui import format_amount, normalize_currency, safe_html_text, escape_html, to_float
 from i18n import t
 from utils.dates import today_local, current_month
 from utils.telegram import safe_edit_text
@@ -40,11 +41,11 @@ async def smart_save(cb: types.CallbackQuery, state: FSMContext, lang: str | Non
         )
         return await cb.answer()
 
-    status = res.get("status")
+    status = res.status
     if status == "preview":
-        goal = res.get("goal", {})
-        amount = res.get("safe_save")
-        active_currency = res.get("currency") or goal.get("currency") or currency
+        goal = res.goal
+        amount = res.safe_save
+        active_currency = res.effective_currency or currency
         if not amount or not goal:
             await safe_edit_text(
                 cb.message,
@@ -56,18 +57,19 @@ async def smart_save(cb: types.CallbackQuery, state: FSMContext, lang: str | Non
         await state.set_state(SmartSaveConfirm.waiting_for_confirm)
         await state.update_data(
             amount=amount,
-            goal_id=goal.get("id"),
-            goal_title=goal.get("title"),
-            preview_currency=active_currency,
-            preview_token=res.get("preview_token"),
+            goal_id=goal.id,
+            goal_title=goal.title,
+            preview_currency=normalize_currency(active_currency) if active_currency else None,
+            preview_token=res.preview_token,
             preview_generated_at=int(time.time()),
+            idempotency_key=new_idempotency_key(),
         )
 
         text = (
             header(t("smart.title", lang), "smart")
             + "\n\n"
             + f"💡 {t('smart.confirm.offer', lang, amount=f'<b>{escape_html(format_amount(amount, currency=active_currency))}</b>')}\n"
-            + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.get('title', '—'), 120)}</b>\n"
+            + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.title or '—', 120)}</b>\n"
             + f"{SEPARATOR}\n"
             + f"{t('smart.confirm.note', lang)}\n\n"
             + t("smart.confirm.question", lang)
@@ -83,10 +85,11 @@ async def smart_save(cb: types.CallbackQuery, state: FSMContext, lang: str | Non
                 await state.set_state(SmartSaveFallback.waiting_for_confirm)
                 await state.update_data(
                     amount=fallback["amount"],
-                    goal_id=fallback["goal"]["id"],
-                    goal_title=fallback["goal"]["title"],
-                    preview_currency=fallback.get("currency"),
+                    goal_id=fallback["goal"].id,
+                    goal_title=fallback["goal"].title,
+                    preview_currency=normalize_currency(fallback["currency"]) if fallback["currency"] else None,
                     preview_generated_at=int(time.time()),
+                    idempotency_key=new_idempotency_key(),
                 )
                 await safe_edit_text(
                     cb.message,
@@ -113,20 +116,18 @@ async def smart_save(cb: types.CallbackQuery, state: FSMContext, lang: str | Non
         )
         return await cb.answer()
 
-    goal = res.get("goal", {})
-    deposited = res.get("deposited") or res.get("safe_save")
-    progress = res.get("goal_progress") or goal.get("progress", 0)
+    deposited = res.deposited or res.safe_save
 
     text = (
         header(t("smart.title", lang), "smart")
         + "\n\n"
-        + money_line(t("smart.saved_label", lang), deposited, "income", currency=res.get("currency") or goal.get("currency") or currency)
+        + money_line(t("smart.saved_label", lang), deposited, "income", currency=res.effective_currency or currency)
         + "\n"
         + t(
             "smart.success.progress_line",
             lang,
-            title=safe_html_text(goal.get("title", "—"), 120),
-            progress=escape_html(progress),
+            title=safe_html_text(res.goal.title if res.goal else "—", 120),
+            progress=escape_html(f"{res.progress:g}"),
         )
         + "\n\n"
         + t("smart.success.footer", lang)
@@ -156,13 +157,13 @@ def render_fallback_prompt(data: dict, lang: str | None = None) -> str:
     amount = data["amount"]
     goal = data["goal"]
     note = data["note"]
-    active_currency = data.get("currency") or goal.get("currency")
+    active_currency = data.get("currency") or goal.currency
 
     return (
         header(t("smart.title", lang), "smart")
         + "\n\n"
         + f"💡 {t('smart.fallback.offer', lang, amount=f'<b>{escape_html(format_amount(amount, currency=active_currency))}</b>')}\n"
-        + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.get('title', '—'), 120)}</b>\n"
+        + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.title or '—', 120)}</b>\n"
         + f"{SEPARATOR}\n"
         + f"{note}\n\n"
         + t("smart.fallback.confirm", lang)
@@ -195,11 +196,12 @@ async def smart_fallback_confirm(cb: types.CallbackQuery, state: FSMContext, lan
         return await cb.answer()
 
     try:
-        result = await rpc("goal.deposit", {
+        goal = await rpc("goal.deposit", {
             "tg_user_id": cb.from_user.id,
             "goal_id": goal_id,
             "amount": amount,
-            "method": "smart_fallback"
+            "method": "smart_fallback",
+            "idempotency_key": data.get("idempotency_key") or new_idempotency_key(),
         })
     except (RPCError, RPCTransportError):
         await state.clear()
@@ -210,14 +212,13 @@ async def smart_fallback_confirm(cb: types.CallbackQuery, state: FSMContext, lan
         )
         return await cb.answer()
 
-    goal = result.get("result") or result
     text = (
         header(t("smart.title", lang), "smart")
         + "\n\n"
-        + money_line(t("smart.saved_label", lang), amount, "income", currency=goal.get("currency") or currency)
+        + money_line(t("smart.saved_label", lang), amount, "income", currency=goal.currency or currency)
         + "\n"
-        + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.get('title', '—'), 120)}</b>\n"
-        + f"📊 {t('label.progress', lang)}: <b>{escape_html(goal.get('progress', 0))}%</b>\n\n"
+        + f"🎯 {t('label.goal', lang)}: <b>{safe_html_text(goal.title or '—', 120)}</b>\n"
+        + f"📊 {t('label.progress', lang)}: <b>{escape_html(f'{goal.progress:g}')}%</b>\n\n"
         + t("smart.fallback.success", lang)
     )
 
@@ -267,6 +268,7 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
             "preview_token": preview_token,
             "expected_goal_id": goal_id,
             "expected_amount": amount,
+            "idempotency_key": data.get("idempotency_key") or new_idempotency_key(),
         })
     except (RPCError, RPCTransportError):
         await state.clear()
@@ -277,7 +279,7 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
         )
         return
 
-    status = res.get("status")
+    status = res.status
     if status == "already_saved":
         await state.clear()
         await safe_edit_text(
@@ -323,10 +325,8 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
         )
         return
 
-    goal = res.get("goal", {})
-    deposited = res.get("deposited") or res.get("safe_save") or amount
-    progress = res.get("goal_progress") or goal.get("progress", 0)
-    actual_goal_id = goal.get("id")
+    deposited = res.deposited or res.safe_save or amount
+    actual_goal_id = res.goal.id if res.goal else None
 
     if (
         actual_goal_id is not None and actual_goal_id != goal_id
@@ -338,7 +338,7 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
                 "smart.confirm.mismatch",
                 lang,
                 expected_amount=escape_html(format_amount(amount, currency=preview_currency)),
-                actual_amount=escape_html(format_amount(deposited, currency=res.get("currency") or goal.get("currency") or preview_currency)),
+                actual_amount=escape_html(format_amount(deposited, currency=res.effective_currency or preview_currency)),
             ),
             reply_markup=await get_main_menu(cb.from_user.id, lang)
         )
@@ -347,13 +347,13 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
     text = (
         header(t("smart.title", lang), "smart")
         + "\n\n"
-        + money_line(t("smart.saved_label", lang), deposited, "income", currency=res.get("currency") or goal.get("currency") or currency)
+        + money_line(t("smart.saved_label", lang), deposited, "income", currency=res.effective_currency or currency)
         + "\n"
         + t(
             "smart.success.progress_line",
             lang,
-            title=safe_html_text(goal.get("title", "—"), 120),
-            progress=escape_html(progress),
+            title=safe_html_text(res.goal.title if res.goal else "—", 120),
+            progress=escape_html(f"{res.progress:g}"),
         )
         + "\n\n"
         + t("smart.success.footer", lang)
@@ -364,16 +364,13 @@ async def smart_confirm(cb: types.CallbackQuery, state: FSMContext, lang: str |
     await cb.answer()
 
 
-async def build_fallback_smart_save(tg_user_id: int, res: dict, lang: str | None = None) -> dict | None:
+async def build_fallback_smart_save(tg_user_id: int, res: SmartSaveResult, lang: str | None = None) -> dict | None:
     today = today_local()
     last_day = calendar.monthrange(today.year, today.month)[1]
     end_of_month = today.replace(day=last_day)
     days_left = (end_of_month - today).days + 1
 
-    balance = None
-
-    daily_limit = to_float(res.get("daily_limit", 0) or 0)
-    if res.get("status") in {"no_spare_money", "too_small"} and daily_limit > 0:
+    if res.status in {"no_spare_money", "too_small"} and res.daily_limit > 0:
         return None
 
     try:
@@ -381,27 +378,25 @@ async def build_fallback_smart_save(tg_user_id: int, res: dict, lang: str | None
             "tg_user_id": tg_user_id,
             "month": current_month(),
         })
-        income = to_float(budget.get("income", 0))
-        expense = to_float(budget.get("expenses", 0))
-        balance = income - expense
     except (RPCError, RPCTransportError):
         return None
 
-    if balance is None or balance <= 0:
+    balance = budget.balance
+    if balance <= 0:
         return None
 
     safe_amount = compute_safe_fallback(balance, days_left)
     if safe_amount <= 0:
         return None
 
-    target_currency = (res.get("currency") or {}).get("code")
+    target_currency = res.currency.code if res.currency else None
     goal = await select_fallback_goal(tg_user_id, target_currency)
     if not goal:
         return None
 
     note = (
         t("smart.fallback.note.no_budget", lang)
-        if res.get("status") == "no_budget"
+        if res.status == "no_budget"
         else t("smart.fallback.note.balance", lang)
     )
 
@@ -409,26 +404,25 @@ async def build_fallback_smart_save(tg_user_id: int, res: dict, lang: str | None
         "amount": safe_amount,
         "goal": goal,
         "note": note,
-        "currency": budget.get("currency") or goal.get("currency"),
+        "currency": budget.currency or goal.currency,
     }
 
 
-async def select_fallback_goal(tg_user_id: int, currency_code: str | None = None) -> dict | None:
+async def select_fallback_goal(tg_user_id: int, currency_code: str | None = None) -> Goal | None:
     try:
-        goals_res = await rpc("goal.list", {"tg_user_id": tg_user_id})
+        goals = await rpc("goal.list", {"tg_user_id": tg_user_id})
     except (RPCError, RPCTransportError):
         return None
 
-    goals = goals_res.get("goals", [])
     if currency_code:
         goals = [
             goal for goal in goals
-            if str(((goal.get("currency") or {}).get("code") or "")).upper() == str(currency_code).upper()
+            if goal.currency is not None and goal.currency.code == str(currency_code).upper()
         ]
     if not goals:
         return None
 
-    primary = next((g for g in goals if g.get("is_primary")), None)
+    primary = next((g for g in goals if g.is_primary), None)
     return primary or goals[0]
 
 
@@ -19,7 +19,7 @@ router = Router()
 
 
 @router.message(Command("start"))
-async def cmd_start(message: types.Message, state: FSMContext, lang: str | None = None):
+async def cmd_start(message: types.Message, state: FSMContext, lang: str | None = None, user_status=None):
     tg_id = message.from_user.id
     bootstrap = {}
 
@@ -44,7 +44,8 @@ async def cmd_start(message: types.Message, state: FSMContext, lang: str | None
     stored_lang = language_store.get(tg_id)
     status = {}
     try:
-        status = await telegram_status(tg_id)
+        # user_status — из UserContextMiddleware: статус, уже полученный в этом апдейте.
+        status = await user_status.get() if user_status else await telegram_status(tg_id)
     except RPCTransportError:
         status = {}
 
@@ -4,13 +4,11 @@ from i18n import t
 def goals_list_keyboard(goals, lang: str | None = None):
     kb = InlineKeyboardBuilder()
     for g in goals:
-        primary = "⭐" if g.get("is_primary") else ""
-        pr = g.get("priority", 1)
-        icon = g.get("icon", "🎯")
+        primary = "⭐" if g.is_primary else ""
 
         kb.button(
-            text=f"{icon} {g['title']} {primary} ({t('goals.list.priority_short', lang, priority=pr)})",
-            callback_data=f"goal_manage_{g['id']}"
+            text=f"{g.icon} {g.title} {primary} ({t('goals.list.priority_short', lang, priority=g.priority)})",
+            callback_data=f"goal_manage_{g.id}"
         )
 
     kb.button(text=t("goals.menu.create_button", lang), callback_data="menu_newgoal")
@@ -5,13 +5,42 @@ import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 
-from config import BOT_TOKEN, validate_config
+from config import BOT_TOKEN, METRICS_HOST, METRICS_PORT, validate_config
 from handlers.router import main_router
-from middlewares.registration import RegistrationMiddleware
-from middlewares.currency import CurrencyMiddleware
-from middlewares.language import LanguageMiddleware
-from middlewares.language_selection import LanguageSelectionMiddleware
+from middlewares.deadline import DeadlineMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+from middlewares.user_context import UserContextMiddleware
+from outbox import run_worker as run_outbox_worker
 from rpc import close_http_client
+from storage.outbox_store import store as outbox_store
+from utils.background import cancel_all as cancel_background_tasks, spawn
+from utils.metrics import start_metrics_server
+from utils.timing import HandlerTimingMiddleware, TelegramTimingMiddleware, TimedMiddleware, UpdateTimingMiddleware
+
+
+def build_dispatcher() -> Dispatcher:
+    """
+    Dispatcher со всеми middleware и роутерами бота; используется и в
+    нагрузочном тесте (tools/load_test.py).
+    """
+    dp = Dispatcher()
+
+    dp.update.outer_middleware(UpdateTimingMiddleware())
+    dp.update.outer_middleware(TimedMiddleware(DeadlineMiddleware()))
+    # outer: лишние апдейты отбрасываются до фильтров и UserContextMiddleware.
+    dp.message.outer_middleware(TimedMiddleware(ThrottlingMiddleware()))
+    dp.callback_query.outer_middleware(TimedMiddleware(ThrottlingMiddleware()))
+
+    # Один экземпляр на оба типа апдейтов: TTL и фоновые обновления профиля общие.
+    user_context = TimedMiddleware(UserContextMiddleware())
+    dp.message.middleware(user_context)
+    dp.callback_query.middleware(user_context)
+    # Последним — ближе всех к хендлеру.
+    dp.message.middleware(HandlerTimingMiddleware())
+    dp.callback_query.middleware(HandlerTimingMiddleware())
+
+    dp.include_router(main_router)
+    return dp
 
 
 async def main():
@@ -25,28 +54,23 @@ async def main():
         token=BOT_TOKEN,
         default=DefaultBotProperties(parse_mode="HTML"),
     )
-    dp = Dispatcher()
-
-    dp.message.middleware(CurrencyMiddleware())
-    dp.callback_query.middleware(CurrencyMiddleware())
-
-    dp.message.middleware(LanguageMiddleware())
-    dp.callback_query.middleware(LanguageMiddleware())
+    bot.session.middleware(TelegramTimingMiddleware())
+    dp = build_dispatcher()
 
-    dp.message.middleware(LanguageSelectionMiddleware())
-    dp.callback_query.middleware(LanguageSelectionMiddleware())
-
-    dp.message.middleware(RegistrationMiddleware())
-    dp.callback_query.middleware(RegistrationMiddleware())
-
-    dp.include_router(main_router)
+    # METRICS_PORT=0 отключает эндпоинт метрик.
+    metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
 
     logging.info("Bot starting...")
+    spawn(run_outbox_worker(), name="outbox")
     try:
         await bot.delete_webhook(drop_pending_updates=True)
         await dp.start_polling(bot)
     finally:
+        await cancel_background_tasks()
+        await outbox_store.close()
         await close_http_client()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+from aiogram import BaseMiddleware
+
+from config import UPDATE_DEADLINE
+from utils.deadline import deadline
+
+
+class DeadlineMiddleware(BaseMiddleware):
+    """
+    Даёт каждому апдейту общий бюджет времени: все вызовы бэкенда внутри
+    middleware и хендлера укладываются в UPDATE_DEADLINE секунд.
+    """
+
+    def __init__(self, seconds: float = UPDATE_DEADLINE):
+        self.seconds = seconds
+
+    async def __call__(self, handler, event, data):
+        with deadline(self.seconds):
+            return await handler(event, data)
@@ -0,0 +1,72 @@
+from aiogram import BaseMiddleware, types
+
+from config import (
+    THROTTLE_CALLBACK_BURST,
+    THROTTLE_CALLBACK_RATE,
+    THROTTLE_MAX_USERS,
+    THROTTLE_MESSAGE_BURST,
+    THROTTLE_MESSAGE_RATE,
+)
+from i18n import t, normalize_lang
+from storage.language_store import store as language_store
+from utils.limits import KeyedRateLimiter
+from utils.metrics import REGISTRY
+
+_THROTTLED = REGISTRY.counter(
+    "throttled_updates_total",
+    "Updates dropped by the anti-flood middleware.",
+    ("kind", "reason"),
+)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Антифлуд: у каждого пользователя своё ведро жетонов для сообщений и
+    для кнопок. Лишние апдейты отбрасываются, на кнопку отвечаем коротким
+    «слишком часто». Повторное нажатие той же кнопки, пока первое ещё
+    обрабатывается, сливается с ним: второй цепочки вызовов не будет.
+    """
+
+    def __init__(
+        self,
+        message_rate: float = THROTTLE_MESSAGE_RATE,
+        message_burst: float = THROTTLE_MESSAGE_BURST,
+        callback_rate: float = THROTTLE_CALLBACK_RATE,
+        callback_burst: float = THROTTLE_CALLBACK_BURST,
+        max_users: int = THROTTLE_MAX_USERS,
+    ):
+        self.messages = KeyedRateLimiter(message_rate, message_burst, max_keys=max_users)
+        self.callbacks = KeyedRateLimiter(callback_rate, callback_burst, max_keys=max_users)
+        self._in_flight: set[tuple[int, str]] = set()
+
+    async def __call__(self, handler, event, data):
+        user = getattr(event, "from_user", None)
+        if not user:
+            return await handler(event, data)
+
+        if isinstance(event, types.CallbackQuery):
+            return await self._callback(handler, event, data, user)
+
+        if self.messages.reserve(user.id, 0) is None:
+            _THROTTLED.inc("message", "rate")
+            return None
+        return await handler(event, data)
+
+    async def _callback(self, handler, cb: types.CallbackQuery, data, user):
+        key = (user.id, cb.data or "")
+        if key in self._in_flight:
+            _THROTTLED.inc("callback", "merged")
+            await cb.answer()
+            return None
+
+        if self.callbacks.reserve(user.id, 0) is None:
+            _THROTTLED.inc("callback", "rate")
+            lang = language_store.get(user.id) or normalize_lang(user.language_code)
+            await cb.answer(t("common.rate_limited", lang))
+            return None
+
+        self._in_flight.add(key)
+        try:
+            return await handler(cb, data)
+        finally:
+            self._in_flight.discard(key)
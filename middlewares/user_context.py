@@ -0,0 +1,270 @@
+import logging
+import time
+from collections import OrderedDict
+
+from aiogram import BaseMiddleware, types
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from config import PROFILE_REFRESH_TTL, REGISTRATION_TTL, RPC_CACHE_MAX_USERS
+from handlers.settings import send_language_prompt
+from i18n import t, normalize_lang, DEFAULT_LANG
+from rpc import telegram_set_language, telegram_status, RPCTransportError
+from states.language_selection import LanguageSelection
+from storage.currency_store import store as currency_store
+from storage.language_store import store as language_store
+from storage.registration_store import store as registration_store
+from utils.background import spawn
+from utils.metrics import REGISTRY
+from utils.ui import normalize_currency
+
+_REGISTRATION_CHECKS = REGISTRY.counter(
+    "registration_checks_total",
+    "Registration checks by how they were answered.",
+    ("mode",),
+)
+
+
+class UserStatus:
+    """
+    telegram_status пользователя в пределах одного апдейта: бэкенд
+    спрашивается не больше одного раза, ошибка тоже запоминается.
+    Хендлеры получают объект как data["user_status"].
+    """
+
+    def __init__(self, tg_user_id: int):
+        self.tg_user_id = tg_user_id
+        self._status: dict | None = None
+        self._error: RPCTransportError | None = None
+
+    @property
+    def cached(self) -> dict | None:
+        return self._status
+
+    async def get(self) -> dict:
+        if self._error is not None:
+            raise self._error
+        if self._status is None:
+            try:
+                self._status = await telegram_status(self.tg_user_id)
+            except RPCTransportError as exc:
+                self._error = exc
+                raise
+        return self._status
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Контекст пользователя для хендлеров: data["lang"], data["currency"],
+    data["is_registered"], data["user_status"]; выбор языка при первом
+    запуске и проверка регистрации.
+    Язык и валюта берутся из локальных хранилищ, бэкенд — только если
+    их там нет или нужно проверить регистрацию, и не больше раза за апдейт.
+    Положительной регистрации из хранилища верим ttl секунд, затем
+    перепроверяем в фоне; неизвестных и незарегистрированных проверяем сразу.
+    Сохранённые язык и валюту отдаём сразу, а старше profile_ttl —
+    обновляем в фоне (stale-while-revalidate), по одному запросу на пользователя.
+    """
+
+    def __init__(
+        self,
+        ttl: float = REGISTRATION_TTL,
+        profile_ttl: float = PROFILE_REFRESH_TTL,
+        max_users: int = RPC_CACHE_MAX_USERS,
+    ):
+        self.currency_store = currency_store
+        self.language_store = language_store
+        self.registration_store = registration_store
+        self.ttl = ttl
+        self.profile_ttl = profile_ttl
+        self.max_users = max_users
+        self._refreshed_at: OrderedDict[int, float] = OrderedDict()
+        self._refreshing: set[int] = set()
+
+    async def __call__(self, handler, event, data):
+        user = getattr(event, "from_user", None)
+        if not user:
+            return await handler(event, data)
+
+        status = UserStatus(user.id)
+        data["user_status"] = status
+        data["currency"] = await self._resolve_currency(user, status)
+        data["lang"] = lang = await self._resolve_language(user, status)
+        data["is_registered"] = self.registration_store.is_registered(user.id)
+
+        state = data.get("state")
+        if state:
+            current = await state.get_state()
+            if current == LanguageSelection.waiting_choice.state:
+                if self._is_language_only_event(event):
+                    return await handler(event, data)
+                suggested = normalize_lang(getattr(user, "language_code", None))
+                await send_language_prompt(event, suggested=suggested, context="start", lang=lang)
+                return None
+
+        if not self.language_store.get(user.id) and not self._is_language_event(event) and not self._is_start_event(event):
+            if state:
+                await state.set_state(LanguageSelection.waiting_choice)
+            suggested = normalize_lang(getattr(user, "language_code", None))
+            await send_language_prompt(event, suggested=suggested, context="start", lang=lang)
+            return None
+
+        if status.cached is not None:
+            data["is_registered"] = self._apply_status(user.id, status.cached)
+        elif self.profile_ttl > 0 and self._age(user.id) >= self.profile_ttl:
+            self._refresh_later(user.id)
+
+        if self._is_allowed_event(event):
+            return await handler(event, data)
+
+        if data["is_registered"] and self.ttl > 0:
+            if status.cached is not None or self._age(user.id) < self.ttl:
+                _REGISTRATION_CHECKS.inc("cached")
+            else:
+                _REGISTRATION_CHECKS.inc("background")
+                self._refresh_later(user.id)
+            return await handler(event, data)
+
+        _REGISTRATION_CHECKS.inc("blocking")
+        try:
+            is_registered = bool((await status.get()).get("registered"))
+        except RPCTransportError:
+            # Бэкенд недоступен: известных пользователей пускаем, записи уйдут в outbox.
+            if data["is_registered"]:
+                return await handler(event, data)
+            await self._notify_backend_unavailable(event, lang)
+            return None
+
+        data["is_registered"] = self._apply_status(user.id, status.cached)
+        if is_registered:
+            return await handler(event, data)
+
+        await self._prompt_registration(event, lang)
+        return None
+
+    def _age(self, tg_user_id: int) -> float:
+        refreshed_at = self._refreshed_at.get(tg_user_id)
+        return float("inf") if refreshed_at is None else time.monotonic() - refreshed_at
+
+    def _apply_status(self, tg_user_id: int, status: dict) -> bool:
+        """
+        Переносит свежий telegram_status в локальные хранилища, возвращает registered.
+        Язык не трогает: это локальный выбор, см. _refresh.
+        """
+        is_registered = bool(status.get("registered"))
+        if is_registered != self.registration_store.is_registered(tg_user_id):
+            self.registration_store.set_registered(tg_user_id, is_registered)
+
+        if status.get("currency"):
+            currency = normalize_currency(status["currency"])
+            if currency != self.currency_store.get(tg_user_id):
+                self.currency_store.set(tg_user_id, currency)
+
+        self._refreshed_at[tg_user_id] = time.monotonic()
+        self._refreshed_at.move_to_end(tg_user_id)
+        while len(self._refreshed_at) > self.max_users:
+            self._refreshed_at.popitem(last=False)
+        return is_registered
+
+    def _refresh_later(self, tg_user_id: int) -> None:
+        if tg_user_id in self._refreshing:
+            return
+        self._refreshing.add(tg_user_id)
+        spawn(self._refresh(tg_user_id), name="profile_refresh")
+
+    async def _refresh(self, tg_user_id: int) -> None:
+        try:
+            status = await telegram_status(tg_user_id)
+        except RPCTransportError:
+            return
+        finally:
+            self._refreshing.discard(tg_user_id)
+        self._apply_status(tg_user_id, status)
+
+        # Как и /start, расходящийся язык досылаем на бэкенд (например, после language.sync_failed).
+        stored_lang = self.language_store.get(tg_user_id)
+        if stored_lang and status.get("language") and normalize_lang(status["language"]) != stored_lang:
+            try:
+                await telegram_set_language(tg_user_id, stored_lang)
+            except RPCTransportError:
+                logging.warning("Language sync postponed for %s", tg_user_id)
+
+    async def _resolve_currency(self, user, status: UserStatus) -> dict | None:
+        currency = self.currency_store.get(user.id)
+        if currency and currency.get("code"):
+            return currency
+        try:
+            currency = (await status.get()).get("currency")
+        except RPCTransportError:
+            return None
+        if not currency:
+            return None
+        currency = normalize_currency(currency)
+        self.currency_store.set(user.id, currency)
+        return currency
+
+    async def _resolve_language(self, user, status: UserStatus) -> str:
+        lang = self.language_store.get(user.id)
+        if not lang:
+            try:
+                backend = await status.get()
+            except RPCTransportError:
+                backend = {}
+            if backend.get("language"):
+                normalized = normalize_lang(backend["language"])
+                # For first-run (unregistered) users, do not auto-accept default language.
+                if backend.get("registered") or normalized != DEFAULT_LANG:
+                    lang = normalized
+                    self.language_store.set(user.id, lang)
+        return lang or normalize_lang(getattr(user, "language_code", None))
+
+    def _is_allowed_event(self, event) -> bool:
+        if isinstance(event, types.Message):
+            if event.text and event.text.startswith(("/start", "/register")):
+                return True
+            if event.contact:
+                return True
+        if isinstance(event, types.CallbackQuery):
+            if event.data and event.data.startswith("onb_"):
+                return True
+            if event.data and event.data.startswith("lang_"):
+                return True
+        return False
+
+    def _is_language_only_event(self, event) -> bool:
+        if isinstance(event, types.CallbackQuery):
+            return bool(event.data and event.data.startswith("lang_"))
+        if isinstance(event, types.Message):
+            return bool(event.text and event.text.startswith("/start"))
+        return False
+
+    def _is_language_event(self, event) -> bool:
+        return isinstance(event, types.CallbackQuery) and bool(event.data and event.data.startswith("lang_"))
+
+    def _is_start_event(self, event) -> bool:
+        return isinstance(event, types.Message) and bool(event.text and event.text.startswith("/start"))
+
+    async def _prompt_registration(self, event, lang: str | None = None):
+        text = (
+            f"{t('registration.prompt.title', lang)}\n\n"
+            f"{t('registration.prompt.body', lang)}"
+        )
+
+        keyboard = ReplyKeyboardMarkup(
+            keyboard=[[KeyboardButton(text=t("registration.button.send_contact", lang), request_contact=True)]],
+            resize_keyboard=True,
+            one_time_keyboard=True,
+        )
+
+        if isinstance(event, types.CallbackQuery):
+            await event.message.answer(text, reply_markup=keyboard)
+            await event.answer()
+        elif isinstance(event, types.Message):
+            await event.answer(text, reply_markup=keyboard)
+
+    async def _notify_backend_unavailable(self, event, lang: str | None = None):
+        text = t("common.error.backend_unavailable", lang)
+        if isinstance(event, types.CallbackQuery):
+            await event.answer(text, show_alert=True)
+            await event.message.answer(text)
+        elif isinstance(event, types.Message):
+            await event.answer(text)
@@ -0,0 +1,253 @@
+# models.py
+"""
+Типизированные ответы бэкенда. rpc.py декодирует их один раз, до кэша:
+числа разбираются сразу, а хендлеры читают готовые атрибуты.
+Модели неизменяемые — кэш отдаёт один и тот же объект всем вызывающим.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _unwrap(payload, key: str = "result") -> dict:
+    # Часть методов дополнительно заворачивает объект в {"result": ...} / {"data": ...}.
+    if not isinstance(payload, dict):
+        return {}
+    inner = payload.get(key)
+    return inner if isinstance(inner, dict) else payload
+
+
+@dataclass(frozen=True, slots=True)
+class Currency:
+    code: str
+    name: str | None = None
+    symbol: str | None = None
+    is_default: bool = False
+    id: int | None = None
+
+    @classmethod
+    def from_payload(cls, data) -> Currency | None:
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict) or not data.get("code"):
+            return None
+        return cls(
+            code=str(data["code"]).upper(),
+            name=data.get("name") or None,
+            symbol=data.get("symbol") or None,
+            is_default=bool(data.get("is_default")),
+            id=data.get("id"),
+        )
+
+    def as_dict(self) -> dict:
+        """
+        Словарь в формате бэкенда — для хранилищ и utils.ui.
+        """
+        data = {"code": self.code, "is_default": self.is_default}
+        if self.id is not None:
+            data["id"] = self.id
+        if self.name:
+            data["name"] = self.name
+        if self.symbol:
+            data["symbol"] = self.symbol
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class Goal:
+    id: int
+    title: str
+    icon: str = "🎯"
+    amount_total: float = 0.0
+    amount_saved: float = 0.0
+    progress: float = 0.0
+    deadline: str | None = None
+    is_primary: bool = False
+    status: str = "active"
+    priority: int = 1
+    currency: Currency | None = None
+
+    @property
+    def percent(self) -> int:
+        return int(self.amount_saved / self.amount_total * 100) if self.amount_total else 0
+
+    @classmethod
+    def from_payload(cls, data) -> Goal:
+        data = _unwrap(data)
+        return cls(
+            id=_int(data.get("id")),
+            title=str(data.get("title") or ""),
+            icon=data.get("icon") or "🎯",
+            amount_total=_float(data.get("amount_total")),
+            amount_saved=_float(data.get("amount_saved")),
+            progress=_float(data.get("progress")),
+            deadline=data.get("deadline") or None,
+            is_primary=bool(data.get("is_primary")),
+            status=data.get("status") or "active",
+            priority=_int(data.get("priority"), 1),
+            currency=Currency.from_payload(data.get("currency")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Budget:
+    month: str | None = None
+    income: float = 0.0
+    expenses: float = 0.0
+    recommended_daily_limit: float = 0.0
+    exists: bool = True
+    currency: Currency | None = None
+
+    @property
+    def balance(self) -> float:
+        return self.income - self.expenses
+
+    @classmethod
+    def from_payload(cls, data) -> Budget:
+        data = _unwrap(data)
+        return cls(
+            month=data.get("month") or None,
+            income=_float(data.get("income")),
+            expenses=_float(data.get("expenses")),
+            recommended_daily_limit=_float(data.get("recommended_daily_limit")),
+            exists=bool(data.get("exists", True)),
+            currency=Currency.from_payload(data.get("currency")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DailyItem:
+    amount: float
+    category: str | None = None
+    description: str | None = None
+    datetime: str | None = None
+    currency: Currency | None = None
+
+    @classmethod
+    def from_payload(cls, data: dict) -> DailyItem:
+        return cls(
+            amount=_float(data.get("amount")),
+            category=data.get("category") or None,
+            description=data.get("description") or None,
+            datetime=data.get("datetime") or None,
+            currency=Currency.from_payload(data.get("currency")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CurrencySummary:
+    currency: Currency | None = None
+    income: float = 0.0
+    expense: float = 0.0
+    balance: float = 0.0
+
+    @classmethod
+    def from_payload(cls, data: dict) -> CurrencySummary:
+        return cls(
+            currency=Currency.from_payload(data.get("currency")),
+            income=_float(data.get("income")),
+            expense=_float(data.get("expense")),
+            balance=_float(data.get("balance")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DailyStats:
+    date: str | None = None
+    income: float = 0.0
+    expense: float = 0.0
+    currency: Currency | None = None
+    summary_by_currency: tuple[CurrencySummary, ...] = ()
+    items: tuple[DailyItem, ...] = ()
+    has_any_transactions: bool = False
+
+    @property
+    def balance(self) -> float:
+        return self.income - self.expense
+
+    @classmethod
+    def from_payload(cls, data) -> DailyStats:
+        data = _unwrap(data)
+        items = tuple(DailyItem.from_payload(item) for item in data.get("items") or [] if isinstance(item, dict))
+        return cls(
+            date=data.get("date") or None,
+            income=_float(data.get("income")),
+            expense=_float(data.get("expense")),
+            currency=Currency.from_payload(data.get("currency")),
+            summary_by_currency=tuple(
+                CurrencySummary.from_payload(group)
+                for group in data.get("summary_by_currency") or []
+                if isinstance(group, dict)
+            ),
+            items=items,
+            has_any_transactions=bool(
+                data.get("has_any_transactions")
+                or data.get("total_transactions_count")
+                or data.get("transactions_count_all_time")
+                or items
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SmartSaveResult:
+    status: str | None = None
+    goal: Goal | None = None
+    safe_save: float = 0.0
+    deposited: float = 0.0
+    goal_progress: float = 0.0
+    daily_limit: float = 0.0
+    currency: Currency | None = None
+    preview_token: str | None = None
+
+    @property
+    def progress(self) -> float:
+        return self.goal_progress or (self.goal.progress if self.goal else 0.0)
+
+    @property
+    def effective_currency(self) -> Currency | None:
+        return self.currency or (self.goal.currency if self.goal else None)
+
+    @classmethod
+    def from_payload(cls, data) -> SmartSaveResult:
+        data = _unwrap(data)
+        goal = data.get("goal")
+        return cls(
+            status=data.get("status"),
+            goal=Goal.from_payload(goal) if isinstance(goal, dict) and goal else None,
+            safe_save=_float(data.get("safe_save")),
+            deposited=_float(data.get("deposited")),
+            goal_progress=_float(data.get("goal_progress")),
+            daily_limit=_float(data.get("daily_limit")),
+            currency=Currency.from_payload(data.get("currency")),
+            preview_token=data.get("preview_token"),
+        )
+
+
+def decode_goal_list(payload) -> tuple[Goal, ...]:
+    goals = _unwrap(payload).get("goals") or []
+    return tuple(Goal.from_payload(item) for item in goals if isinstance(item, dict))
+
+
+def decode_currency(payload) -> Currency | None:
+    return Currency.from_payload(_unwrap(payload, "data"))
+
+
+def decode_currency_list(payload) -> tuple[Currency, ...]:
+    items = payload.get("data") if isinstance(payload, dict) else payload
+    currencies = (Currency.from_payload(item) for item in items or [])
+    return tuple(currency for currency in currencies if currency is not None)
@@ -0,0 +1,170 @@
+# outbox.py
+"""
+Записи, которые нельзя терять (transaction.import, goal.deposit): если
+бэкенд недоступен, запись кладётся в локальный outbox (SQLite) и
+досылается фоновым воркером пачками, когда бэкенд снова отвечает.
+"""
+import asyncio
+import logging
+from typing import Any
+
+from config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_ENABLED,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_BACKOFF,
+    OUTBOX_REPLAY_INTERVAL,
+)
+from rpc import (
+    RPCCircuitOpenError,
+    RPCDeadlineError,
+    RPCError,
+    RPCOverloadedError,
+    RPCTransportError,
+    background_calls,
+    rpc,
+    rpc_batch,
+)
+from storage.outbox_store import OutboxEntry, store
+from utils.metrics import REGISTRY
+
+_REPLAYED = REGISTRY.counter("outbox_replayed_total", "Outbox entries replayed to the backend.", ("method", "result"))
+
+
+@REGISTRY.collector
+def _collect_outbox_metrics():
+    yield "outbox_pending", "gauge", "Writes waiting in the outbox.", [({}, store.pending_count)]
+
+
+def _backend_failed(exc: RPCTransportError) -> bool:
+    """
+    Отказ бэкенда или сети (соединение, 5xx, открытый предохранитель, зависший
+    запрос), а не наш ограничитель и не дедлайн, истёкший до отправки.
+    """
+    if isinstance(exc, RPCOverloadedError):
+        return False
+    if isinstance(exc, RPCDeadlineError):
+        return exc.sent
+    return True
+
+
+async def rpc_or_enqueue(method: str, params: dict) -> tuple[Any, bool]:
+    """
+    rpc() для записи. Если бэкенд недоступен, запись сохраняется в outbox.
+    Возвращает (result, False) либо (None, True), если запись отложена.
+    RPCOverloadedError (сработал наш ограничитель) пробрасывается: пользователю
+    стоит притормозить, а не ждать синхронизации. Не удалось сохранить и в
+    outbox — пробрасывает исходную ошибку.
+    """
+    try:
+        return await rpc(method, params), False
+    except RPCTransportError as exc:
+        if not OUTBOX_ENABLED or not _backend_failed(exc):
+            raise
+        try:
+            await store.add(method, params)
+        except Exception:
+            logging.exception("Failed to queue %s in outbox", method)
+            raise exc
+        logging.warning("Queued %s in outbox after %s", method, exc.__class__.__name__)
+        return None, True
+
+
+def _reached_backend(exc: RPCTransportError) -> bool:
+    return not isinstance(exc, RPCCircuitOpenError) and _backend_failed(exc)
+
+
+async def _settle(entries: list[OutboxEntry], results: list) -> None:
+    delivered = []
+    for entry, result in zip(entries, results):
+        if isinstance(result, RPCError):
+            # Бэкенд ответил и отказал — повтор не поможет.
+            logging.error("Outbox entry rejected id=%s method=%s error=%s", entry.id, entry.method, result)
+            _REPLAYED.inc(entry.method, "rejected")
+            await store.reject(entry.id, str(result))
+        else:
+            _REPLAYED.inc(entry.method, "delivered")
+            delivered.append(entry.id)
+    await store.delete(delivered)
+    if delivered:
+        logging.info("Outbox replayed %s entries", len(delivered))
+
+
+async def _attempt_failed(entry: OutboxEntry, exc: RPCTransportError) -> None:
+    error = exc.__class__.__name__
+    if entry.attempts + 1 < OUTBOX_MAX_ATTEMPTS:
+        await store.retry_later([entry.id], error)
+        return
+    logging.error("Outbox entry failed id=%s method=%s attempts=%s", entry.id, entry.method, entry.attempts + 1)
+    _REPLAYED.inc(entry.method, "failed")
+    await store.fail(entry.id, error)
+
+
+async def _replay_each(entries: list[OutboxEntry]) -> None:
+    """
+    Досылает записи по одной. Попытка засчитывается записи, только если
+    бэкенд в этом же проходе принял другие: иначе это сбой бэкенда, а не записи.
+    """
+    failed: list[tuple[OutboxEntry, RPCTransportError]] = []
+    answered = False
+    for entry in entries:
+        try:
+            results = await rpc_batch([(entry.method, entry.params)])
+        except RPCTransportError as exc:
+            if not _reached_backend(exc):
+                raise
+            failed.append((entry, exc))
+            continue
+        answered = True
+        await _settle([entry], results)
+
+    if failed and not answered:
+        raise failed[-1][1]
+    for entry, exc in failed:
+        await _attempt_failed(entry, exc)
+
+
+async def replay_once() -> int:
+    """
+    Отправляет одну пачку из outbox одним batch-запросом. Если пачка не
+    прошла целиком, записи досылаются по одной, чтобы одна «плохая» запись
+    не держала остальные.
+    Пакет собран из записей разных пользователей, поэтому их лимиты
+    запросов к досылке не применяются.
+    Возвращает размер пачки; RPCTransportError — бэкенд всё ещё недоступен.
+    """
+    entries = await store.pending(OUTBOX_BATCH_SIZE)
+    if not entries:
+        return 0
+
+    with background_calls():
+        try:
+            results = await rpc_batch([(entry.method, entry.params) for entry in entries])
+        except RPCTransportError as exc:
+            if len(entries) == 1 or not _reached_backend(exc):
+                raise
+            await _replay_each(entries)
+            return len(entries)
+
+    await _settle(entries, results)
+    return len(entries)
+
+
+async def run_worker() -> None:
+    """
+    Досылает outbox, пока бот работает. Пока бэкенд недоступен,
+    пауза между попытками растёт до OUTBOX_MAX_BACKOFF.
+    """
+    delay = OUTBOX_REPLAY_INTERVAL
+    while True:
+        try:
+            while await replay_once() >= OUTBOX_BATCH_SIZE:
+                pass
+            delay = OUTBOX_REPLAY_INTERVAL
+        except RPCTransportError as exc:
+            logging.warning("Outbox replay postponed: %s", exc.__class__.__name__)
+            delay = min(delay * 2, OUTBOX_MAX_BACKOFF)
+        except Exception:
+            logging.exception("Outbox replay failed")
+            delay = min(delay * 2, OUTBOX_MAX_BACKOFF)
+        await asyncio.sleep(delay)
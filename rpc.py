@@ -1,16 +1,82 @@
 import asyncio
+import gzip
 import httpx
+import itertools
+import json
 import logging
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any
 
 from config import (
+    RPC_AI_CONCURRENCY,
+    RPC_BREAKER_COOLDOWN,
+    RPC_BREAKER_FAILURE_RATE,
+    RPC_BREAKER_MIN_CALLS,
+    RPC_BREAKER_WINDOW,
+    RPC_CACHE_MAX_USERS,
+    RPC_CACHE_TTL,
+    RPC_COMPRESS_MIN_BYTES,
+    RPC_COMPRESS_REQUESTS,
+    RPC_HEDGE_ENABLED,
+    RPC_HEDGE_MIN_DELAY,
+    RPC_HEDGE_MIN_SAMPLES,
+    RPC_HEDGE_PERCENTILE,
+    RPC_HTTP2,
+    RPC_JOB_POLL_INTERVAL,
+    RPC_JOB_POLL_MAX_INTERVAL,
+    RPC_JOB_TIMEOUT,
+    RPC_JOBS_ENABLED,
+    RPC_JSON_CODEC,
+    RPC_KEEPALIVE_EXPIRY,
+    RPC_MAX_CONCURRENCY,
+    RPC_POOL_MAX_CONNECTIONS,
+    RPC_POOL_MAX_KEEPALIVE,
+    RPC_POOL_TIMEOUT,
+    RPC_QUEUE_MAX,
+    RPC_QUEUE_TIMEOUT,
+    RPC_READ_CONCURRENCY,
+    RPC_RESPONSE_COMPRESSION,
+    RPC_RETRY_ATTEMPTS,
+    RPC_RETRY_BASE_DELAY,
+    RPC_RETRY_BUDGET_RATIO,
+    RPC_RETRY_MAX_AFTER,
+    RPC_RETRY_MAX_DELAY,
+    RPC_STATUS_BACKOFF_BASE,
+    RPC_STATUS_BACKOFF_GLOBAL_AFTER,
+    RPC_STATUS_BACKOFF_MAX,
     RPC_URL,
     RPC_TOKEN,
+    RPC_USER_BURST,
+    RPC_USER_RATE,
+    RPC_WRITE_CONCURRENCY,
     TELEGRAM_BOT_SECRET,
     TELEGRAM_REGISTER_URL,
     TELEGRAM_STATUS_URL,
     TELEGRAM_SET_LANGUAGE_URL,
 )
-from utils.privacy import sanitize_log_payload
+from models import (
+    Budget,
+    Currency,
+    DailyStats,
+    Goal,
+    SmartSaveResult,
+    decode_currency,
+    decode_currency_list,
+    decode_goal_list,
+)
+from utils import timing
+from utils.cache import NegativeCache, UserTTLCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.deadline import remaining as deadline_remaining
+from utils.jsoncodec import get_codec
+from utils.latency import LatencyWindow
+from utils.limits import ConcurrencyLimiter, KeyedRateLimiter, LimiterFull
+from utils.metrics import REGISTRY
+from utils.privacy import LazySafePayload
+from utils.retry import RetryPolicy, parse_retry_after
 
 
 class RPCError(RuntimeError):
@@ -31,6 +97,35 @@ class RPCTransportError(RuntimeError):
     """
 
 
+class RPCCircuitOpenError(RPCTransportError):
+    """
+    Бэкенд временно отключён предохранителем, запрос не отправлялся.
+    """
+
+
+class RPCDeadlineError(RPCTransportError):
+    """
+    Бюджет времени апдейта исчерпан: запрос не отправлялся или был прерван.
+    sent — запрос уже ушёл на бэкенд, но ответа не дождались.
+    """
+
+    def __init__(self, message: str, sent: bool = False):
+        super().__init__(message)
+        self.sent = sent
+
+
+class RPCOverloadedError(RPCTransportError):
+    """
+    Вызов отклонён ограничителем нагрузки, запрос не отправлялся.
+    """
+
+
+class RPCBackoffError(RPCTransportError):
+    """
+    Такой же запрос недавно не удался, повтор отложен; запрос не отправлялся.
+    """
+
+
 class RegistrationError(RuntimeError):
     """
     Ошибка регистрации телефона.
@@ -43,8 +138,27 @@ class RegistrationError(RuntimeError):
 
 
 _HTTP_CLIENT: httpx.AsyncClient | None = None
-_HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=20.0, write=10.0, pool=5.0)
+_JSON = get_codec(RPC_JSON_CODEC)
+_HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=20.0, write=10.0, pool=RPC_POOL_TIMEOUT)
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=RPC_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=RPC_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=RPC_KEEPALIVE_EXPIRY,
+)
+_POOL_STATS = {
+    "requests": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "pool_timeouts": 0,
+}
 _RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+_RETRY_POLICY = RetryPolicy(
+    attempts=RPC_RETRY_ATTEMPTS,
+    base_delay=RPC_RETRY_BASE_DELAY,
+    max_delay=RPC_RETRY_MAX_DELAY,
+    budget_ratio=RPC_RETRY_BUDGET_RATIO,
+    max_retry_after=RPC_RETRY_MAX_AFTER,
+)
 _RETRYABLE_RPC_METHODS = {
     "budget.getMonth",
     "budget.recalculate",
@@ -52,8 +166,96 @@ _RETRYABLE_RPC_METHODS = {
     "currency.list",
     "goal.get",
     "goal.list",
+    "job.get",
     "transaction.getDaily",
 }
+# Записи, которые повторяются только с ключом идемпотентности:
+# бэкенд применяет запросы с одним idempotency_key один раз.
+_IDEMPOTENT_RPC_METHODS = {
+    "goal.deposit",
+    "smart.save.run",
+    "transaction.import",
+}
+_CACHED_RPC_METHODS = {
+    "budget.getMonth",
+    "currency.get",
+    "currency.list",
+    "goal.get",
+    "goal.list",
+    "transaction.getDaily",
+}
+# Какие закэшированные методы (по префиксу) устаревают после записи; None — все данные пользователя.
+# Вызовы с params["preview"] ничего не меняют и кэш не сбрасывают.
+_RPC_INVALIDATIONS: dict[str, tuple[str, ...] | None] = {
+    "budget.recalculate": ("budget.",),
+    "currency.set": None,
+    "goal.close": ("goal.",),
+    "goal.create": ("goal.",),
+    "goal.deposit": ("goal.", "budget.", "transaction."),
+    "goal.reopen": ("goal.",),
+    "goal.setPrimary": ("goal.",),
+    "smart.save.run": ("goal.", "budget.", "transaction."),
+    "transaction.import": ("transaction.", "budget.", "goal."),
+}
+# Методы с типизированным ответом: result декодируется в модель один раз, до кэша.
+_RPC_DECODERS = {
+    "budget.getMonth": Budget.from_payload,
+    "budget.recalculate": Budget.from_payload,
+    "currency.get": decode_currency,
+    "currency.list": decode_currency_list,
+    "currency.set": decode_currency,
+    "goal.close": Goal.from_payload,
+    "goal.deposit": Goal.from_payload,
+    "goal.get": Goal.from_payload,
+    "goal.list": decode_goal_list,
+    "goal.reopen": Goal.from_payload,
+    "smart.save.run": SmartSaveResult.from_payload,
+    "transaction.getDaily": DailyStats.from_payload,
+}
+_JOB_PENDING_STATUSES = {"pending", "queued", "running"}
+# None — бэкенд ещё не спрашивали; False — job API нет, ai.* вызываются напрямую.
+_JOBS_SUPPORTED: bool | None = None
+_RPC_CACHE = UserTTLCache(RPC_CACHE_TTL, max_users=RPC_CACHE_MAX_USERS)
+_RPC_IDS = itertools.count(1)
+_CIRCUIT_BREAKERS: dict[str, CircuitBreaker] = {}
+_LATENCY_WINDOWS: dict[str, LatencyWindow] = {}
+_HEDGE_STATS = {"hedged": 0, "hedge_wins": 0, "hedge_skipped": 0}
+_SINGLE_FLIGHT_LIMIT = 1024
+_DEADLINE_SLACK = 0.05
+_IN_FLIGHT: dict[tuple, asyncio.Future] = {}
+# Общий лимит одновременных вызовов бэкенда и лимиты по семействам методов.
+_GLOBAL_LIMITER = ConcurrencyLimiter(RPC_MAX_CONCURRENCY, RPC_QUEUE_MAX)
+_FAMILY_LIMITERS = {
+    "ai": ConcurrencyLimiter(RPC_AI_CONCURRENCY, RPC_QUEUE_MAX),
+    "read": ConcurrencyLimiter(RPC_READ_CONCURRENCY, RPC_QUEUE_MAX),
+    "write": ConcurrencyLimiter(RPC_WRITE_CONCURRENCY, RPC_QUEUE_MAX),
+}
+_USER_LIMITER = KeyedRateLimiter(RPC_USER_RATE, RPC_USER_BURST, max_keys=RPC_CACHE_MAX_USERS)
+# False внутри background_calls(): вызов делает бот сам, а не пользователь.
+_USER_LIMITED: ContextVar[bool] = ContextVar("rpc_user_limited", default=True)
+# Неудачные telegram.status: по пользователю и общий (ключ None) на время сбоя бэкенда.
+_STATUS_FAILURES = NegativeCache(RPC_STATUS_BACKOFF_BASE, RPC_STATUS_BACKOFF_MAX, max_keys=RPC_CACHE_MAX_USERS)
+_STATUS_OUTAGE = NegativeCache(
+    RPC_STATUS_BACKOFF_BASE,
+    RPC_STATUS_BACKOFF_MAX,
+    threshold=RPC_STATUS_BACKOFF_GLOBAL_AFTER,
+)
+
+_RPC_LATENCY = REGISTRY.histogram("rpc_request_duration_seconds", "Backend call latency.", ("method",))
+_RPC_ERRORS = REGISTRY.counter("rpc_errors_total", "Backend call errors by type.", ("method", "type"))
+_RPC_RETRIES = REGISTRY.counter("rpc_retries_total", "Backend request retries.", ("method",))
+_RPC_IN_FLIGHT = REGISTRY.gauge("rpc_in_flight", "Backend calls in progress.", ("method",))
+_RPC_BYTES = REGISTRY.counter(
+    "rpc_body_bytes_total",
+    "Backend request/response body bytes: raw JSON and on the wire.",
+    ("direction", "stage"),
+)
+_RPC_SHED = REGISTRY.counter("rpc_shed_total", "Backend calls rejected by the load limiters.", ("family", "reason"))
+_RPC_NEGATIVE_HITS = REGISTRY.counter(
+    "rpc_negative_cache_hits_total",
+    "Status lookups skipped after recent failures.",
+    ("scope",),
+)
 
 
 def _base_headers() -> dict:
@@ -66,16 +268,60 @@ def _base_headers() -> dict:
     if TELEGRAM_BOT_SECRET:
         headers["X-Telegram-Bot-Secret"] = TELEGRAM_BOT_SECRET
 
+    if not RPC_RESPONSE_COMPRESSION:
+        # Иначе Accept-Encoding ставит сам httpx — по тем декодерам, что установлены.
+        headers["Accept-Encoding"] = "identity"
     return headers
 
 
+def _encode_body(body: bytes) -> tuple[bytes, dict | None]:
+    if not RPC_COMPRESS_REQUESTS or len(body) < RPC_COMPRESS_MIN_BYTES:
+        return body, None
+    # Уровень 5: почти та же степень сжатия JSON, что у 9, но заметно быстрее.
+    return gzip.compress(body, compresslevel=5), {"Content-Encoding": "gzip"}
+
+
+def _http2_enabled() -> bool:
+    if not RPC_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("RPC_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
 async def _get_http_client() -> httpx.AsyncClient:
     global _HTTP_CLIENT
     if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
-        _HTTP_CLIENT = httpx.AsyncClient(timeout=_HTTP_TIMEOUT)
+        # Заголовки постоянные: собираем один раз и храним на клиенте.
+        _HTTP_CLIENT = httpx.AsyncClient(
+            headers=_base_headers(),
+            timeout=_HTTP_TIMEOUT,
+            limits=_HTTP_LIMITS,
+            http2=_http2_enabled(),
+        )
     return _HTTP_CLIENT
 
 
+def http_pool_stats() -> dict:
+    """
+    Загрузка пула соединений к бэкенду: сколько запросов в полёте,
+    пик, число PoolTimeout и открытые/простаивающие соединения.
+    """
+    stats = dict(_POOL_STATS)
+    stats["max_connections"] = _HTTP_LIMITS.max_connections
+    stats["max_keepalive_connections"] = _HTTP_LIMITS.max_keepalive_connections
+
+    pool = getattr(getattr(_HTTP_CLIENT, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+    return stats
+
+
 async def close_http_client() -> None:
     global _HTTP_CLIENT
     if _HTTP_CLIENT is not None and not _HTTP_CLIENT.is_closed:
@@ -83,31 +329,452 @@ async def close_http_client() -> None:
     _HTTP_CLIENT = None
 
 
+@contextmanager
+def _observed(method: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except RPCError:
+        _RPC_ERRORS.inc(method, "rpc")
+        raise
+    except (RPCBackoffError, RPCCircuitOpenError, RPCOverloadedError):
+        # Запрос не отправлялся — это отказ наших ограничителей, а не сети.
+        _RPC_ERRORS.inc(method, "rejected")
+        raise
+    except RPCTransportError:
+        _RPC_ERRORS.inc(method, "transport")
+        raise
+    except RegistrationError:
+        _RPC_ERRORS.inc(method, "registration")
+        raise
+    finally:
+        timing.add("rpc", method, time.perf_counter() - started)
+
+
+@contextmanager
+def _backend_timed(*methods: str):
+    """
+    Задержка и вызовы в полёте только для запросов, ушедших на бэкенд:
+    попадания в кэш, ожидание чужого запроса и отказы ограничителей не считаются.
+    """
+    for method in methods:
+        _RPC_IN_FLIGHT.inc(method)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        for method in methods:
+            _RPC_IN_FLIGHT.dec(method)
+            _RPC_LATENCY.observe(elapsed, method)
+
+
+@REGISTRY.collector
+def _collect_rpc_metrics():
+    pool = http_pool_stats()
+    yield "rpc_pool_in_flight", "gauge", "Requests holding a pool connection.", [({}, pool["in_flight"])]
+    yield "rpc_pool_peak_in_flight", "gauge", "Peak concurrent pool requests.", [({}, pool["peak_in_flight"])]
+    yield "rpc_pool_max_connections", "gauge", "Configured pool size.", [({}, pool["max_connections"])]
+    yield "rpc_pool_timeouts_total", "counter", "Requests that timed out waiting for a pool connection.", [({}, pool["pool_timeouts"])]
+    if "connections" in pool:
+        yield "rpc_pool_connections", "gauge", "Open pool connections by state.", [
+            ({"state": "idle"}, pool["idle_connections"]),
+            ({"state": "active"}, pool["connections"] - pool["idle_connections"]),
+        ]
+    yield "rpc_circuit_open", "gauge", "1 when the circuit breaker is not closed.", [
+        ({"circuit": name, "state": state}, int(state != "closed")) for name, state in circuit_states().items()
+    ]
+    yield "rpc_hedged_total", "counter", "Hedge requests sent.", [({}, _HEDGE_STATS["hedged"])]
+    yield "rpc_hedge_wins_total", "counter", "Hedge requests that answered first.", [({}, _HEDGE_STATS["hedge_wins"])]
+    yield "rpc_hedge_skipped_total", "counter", "Hedge requests skipped for lack of a limiter slot.", [
+        ({}, _HEDGE_STATS["hedge_skipped"])
+    ]
+    yield "rpc_retry_budget_exhausted_total", "counter", "Retries skipped by the retry budget.", [({}, _RETRY_POLICY.budget_exhausted)]
+    yield "rpc_cache_requests_total", "counter", "RPC cache lookups.", [
+        ({"result": "hit"}, _RPC_CACHE.hits),
+        ({"result": "miss"}, _RPC_CACHE.misses),
+    ]
+    limiters = {"global": _GLOBAL_LIMITER, **_FAMILY_LIMITERS}
+    yield "rpc_limiter_in_use", "gauge", "Backend calls holding a limiter slot.", [
+        ({"limiter": name}, limiter.in_use) for name, limiter in limiters.items()
+    ]
+    yield "rpc_limiter_waiting", "gauge", "Backend calls queued for a limiter slot.", [
+        ({"limiter": name}, limiter.waiting) for name, limiter in limiters.items()
+    ]
+
+
+def _deadline_timeout(left: float | None):
+    """
+    Таймаут запроса, урезанный до оставшегося бюджета апдейта.
+    """
+    if left is None or left >= _HTTP_TIMEOUT.read:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(
+        connect=min(_HTTP_TIMEOUT.connect, left),
+        read=left,
+        write=min(_HTTP_TIMEOUT.write, left),
+        pool=min(_HTTP_TIMEOUT.pool, left),
+    )
+
+
+def _deadline_spent() -> bool:
+    # Таймер, урезанный до остатка дедлайна, может сработать чуть раньше него.
+    left = deadline_remaining()
+    return left is not None and left <= _DEADLINE_SLACK
+
+
+def _deadline_allows(delay: float | None) -> bool:
+    left = deadline_remaining()
+    return delay is not None and (left is None or left > delay)
+
+
+def _circuit_breaker(name: str) -> CircuitBreaker:
+    breaker = _CIRCUIT_BREAKERS.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            failure_rate=RPC_BREAKER_FAILURE_RATE,
+            window=RPC_BREAKER_WINDOW,
+            min_calls=RPC_BREAKER_MIN_CALLS,
+            cooldown=RPC_BREAKER_COOLDOWN,
+        )
+        _CIRCUIT_BREAKERS[name] = breaker
+    return breaker
+
+
+def circuit_states() -> dict[str, str]:
+    return {name: breaker.state for name, breaker in _CIRCUIT_BREAKERS.items()}
+
+
+def _rpc_circuit(method: str) -> str:
+    return f"rpc:{method.split('.', 1)[0]}"
+
+
 def _should_retry_rpc_method(method: str) -> bool:
     return method.startswith("ai.") or method in _RETRYABLE_RPC_METHODS
 
 
+def new_idempotency_key() -> str:
+    """
+    Ключ одной логической операции. Создаётся при показе подтверждения,
+    хранится в данных FSM и передаётся как params["idempotency_key"].
+    """
+    return uuid.uuid4().hex
+
+
+def _may_retry_call(method: str, params: dict | None) -> bool:
+    if _should_retry_rpc_method(method):
+        return True
+    return method in _IDEMPOTENT_RPC_METHODS and bool((params or {}).get("idempotency_key"))
+
+
+def _rpc_family(method: str) -> str:
+    if method.startswith(("ai.", "job.")):
+        return "ai"
+    return "read" if method in _RETRYABLE_RPC_METHODS else "write"
+
+
+def _batch_family(calls: list[tuple[str, dict | None]]) -> str:
+    families = {_rpc_family(method) for method, _ in calls}
+    for family in ("ai", "write"):
+        if family in families:
+            return family
+    return "read"
+
+
+def _params_user(params: dict | None):
+    params = params or {}
+    user = params.get("tg_user_id")
+    if user is None and isinstance(params.get("params"), dict):
+        # job.submit: пользователь — во вложенных параметрах задания.
+        user = params["params"].get("tg_user_id")
+    return user
+
+
+def _call_user(calls: list[tuple[str, dict | None]]):
+    for _, params in calls:
+        user = _params_user(params)
+        if user is not None:
+            return user
+    return None
+
+
+@contextmanager
+def background_calls():
+    """
+    Вызовы внутри блока не расходуют жетоны пользователей: например, досылка
+    outbox, где в одном пакете записи разных пользователей.
+    """
+    token = _USER_LIMITED.set(False)
+    try:
+        yield
+    finally:
+        _USER_LIMITED.reset(token)
+
+
+@asynccontextmanager
+async def _admitted(family: str, user=None, circuit: str | None = None):
+    """
+    Пропускает вызов к бэкенду через ограничители: жетон пользователя,
+    место в лимите семейства методов и в общем лимите.
+    Ждёт не дольше RPC_QUEUE_TIMEOUT и оставшегося дедлайна апдейта;
+    переполненная очередь или слишком долгое ожидание — RPCOverloadedError.
+    Открытый предохранитель circuit отклоняет вызов сразу, до ограничителей.
+    """
+    if circuit is not None and _circuit_breaker(circuit).rejects():
+        logging.warning("RPC call rejected family=%s circuit open circuit=%s", family, circuit)
+        raise RPCCircuitOpenError(f"Circuit open: {circuit}")
+
+    left = deadline_remaining()
+    budget = RPC_QUEUE_TIMEOUT if left is None else max(0.0, min(left, RPC_QUEUE_TIMEOUT))
+    by_deadline = left is not None and left <= RPC_QUEUE_TIMEOUT
+    expires_at = time.monotonic() + budget
+
+    if user is not None and _USER_LIMITED.get():
+        wait = _USER_LIMITER.reserve(user, budget)
+        if wait is None:
+            _RPC_SHED.inc(family, "user_rate")
+            logging.warning("RPC call shed family=%s reason=user_rate", family)
+            raise RPCOverloadedError("Per-user rate limit exceeded")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async with AsyncExitStack() as stack:
+        for limiter in (_FAMILY_LIMITERS[family], _GLOBAL_LIMITER):
+            try:
+                await stack.enter_async_context(limiter.slot(max(0.0, expires_at - time.monotonic())))
+            except LimiterFull:
+                _RPC_SHED.inc(family, "queue_full")
+                logging.warning("RPC call shed family=%s reason=queue_full", family)
+                raise RPCOverloadedError("Backend call queue is full")
+            except asyncio.TimeoutError:
+                if by_deadline:
+                    raise RPCDeadlineError(f"{family}: deadline exceeded in queue")
+                _RPC_SHED.inc(family, "queue_timeout")
+                logging.warning("RPC call shed family=%s reason=queue_timeout", family)
+                raise RPCOverloadedError("Backend call queue timeout")
+        yield
+
+
+def _params_key(params) -> str | None:
+    try:
+        return json.dumps(params, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+
+
+def _should_hedge_rpc_method(method: str) -> bool:
+    # ai.* и так медленные и дорогие: второй запрос удвоил бы работу бэкенда.
+    return RPC_HEDGE_ENABLED and _should_retry_rpc_method(method) and not method.startswith("ai.")
+
+
+def _hedge_delay(window: LatencyWindow) -> float | None:
+    if len(window) < RPC_HEDGE_MIN_SAMPLES:
+        return None
+    return max(RPC_HEDGE_MIN_DELAY, window.percentile(RPC_HEDGE_PERCENTILE))
+
+
+class _HedgeSkipped(Exception):
+    """
+    Для второго запроса не нашлось свободного места в лимитах.
+    """
+
+
+@asynccontextmanager
+async def _hedge_admitted(family: str):
+    """
+    Места в лимите семейства и в общем лимите для второго запроса — только
+    если они свободны сейчас: ради hedge в очередь не встаём.
+    """
+    async with _FAMILY_LIMITERS[family].try_slot() as admitted:
+        if not admitted:
+            yield False
+            return
+        async with _GLOBAL_LIMITER.try_slot() as admitted:
+            yield admitted
+
+
+async def _race(send, delay: float, family: str):
+    async def hedge():
+        async with _hedge_admitted(family) as admitted:
+            if not admitted:
+                _HEDGE_STATS["hedge_skipped"] += 1
+                raise _HedgeSkipped()
+            _HEDGE_STATS["hedged"] += 1
+            return await send()
+
+    tasks = [asyncio.ensure_future(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            tasks.append(asyncio.ensure_future(hedge()))
+
+        pending = set(tasks)
+        last_exc: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    if task is not tasks[0]:
+                        _HEDGE_STATS["hedge_wins"] += 1
+                    return task.result()
+                if not isinstance(exc, _HedgeSkipped):
+                    last_exc = exc
+        raise last_exc
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _send_hedged(key: str, send, hedge: bool, family: str):
+    """
+    Отправляет запрос; если hedge и ответа нет дольше наблюдаемого перцентиля
+    задержки для key, шлёт второй такой же (при свободном месте в лимитах
+    family) и берёт тот ответ, что придёт первым. Задержки копятся только
+    для запросов, которые можно дублировать.
+    """
+    if not hedge:
+        return await send()
+
+    window = _LATENCY_WINDOWS.get(key)
+    if window is None:
+        window = _LATENCY_WINDOWS[key] = LatencyWindow()
+
+    started = time.monotonic()
+    delay = _hedge_delay(window)
+    result = await send() if delay is None else await _race(send, delay, family)
+    window.add(time.monotonic() - started)
+    return result
+
+
+def hedge_stats() -> dict:
+    return dict(_HEDGE_STATS)
+
+
+def _flight_key(action: str, params, generation=None) -> tuple | None:
+    """
+    generation — поколение кэша пользователя на момент вызова: чтение после
+    записи не присоединяется к запросу, начатому до неё.
+    """
+    key = _params_key(params)
+    return (action, key, generation) if key is not None else None
+
+
+def _cache_key(method: str, params: dict | None) -> tuple | None:
+    if method not in _CACHED_RPC_METHODS or not params:
+        return None
+    user = params.get("tg_user_id")
+    key = _params_key(params)
+    if user is None or key is None:
+        return None
+    return user, (method, key)
+
+
+def _invalidate_rpc_cache(method: str, params: dict | None) -> None:
+    if (params or {}).get("preview"):
+        return
+    if method.startswith("goal.priority."):
+        prefixes = ("goal.",)
+    elif method in _RPC_INVALIDATIONS:
+        prefixes = _RPC_INVALIDATIONS[method]
+    else:
+        return
+
+    user = (params or {}).get("tg_user_id")
+    if user is not None:
+        _RPC_CACHE.invalidate(user, prefixes)
+
+
+def _forget_flight(key: tuple, task: asyncio.Future) -> None:
+    if _IN_FLIGHT.get(key) is task:
+        del _IN_FLIGHT[key]
+    if not task.cancelled():
+        task.exception()
+
+
+async def _single_flight(key: tuple | None, factory):
+    """
+    Объединяет одинаковые запросы, которые уже в полёте: повторные вызовы
+    ждут результат первого вместо отправки дубля на бэкенд.
+    Только для методов без побочных эффектов.
+    """
+    if key is None:
+        return await factory()
+
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        if len(_IN_FLIGHT) >= _SINGLE_FLIGHT_LIMIT:
+            return await factory()
+        task = asyncio.ensure_future(factory())
+        _IN_FLIGHT[key] = task
+        task.add_done_callback(lambda done: _forget_flight(key, done))
+
+    # shield: отмена одного из ожидающих не должна отменять запрос для остальных.
+    left = deadline_remaining()
+    if left is None:
+        return await asyncio.shield(task)
+    try:
+        # У присоединившегося вызова может быть свой, более короткий дедлайн.
+        return await asyncio.wait_for(asyncio.shield(task), max(left, 0.0))
+    except asyncio.TimeoutError:
+        raise RPCDeadlineError(f"{key[0]}: deadline exceeded", sent=True)
+
+
 async def _post_json(
     url: str,
-    payload: dict,
+    payload: dict | list,
     *,
     action: str,
     allow_retry: bool = False,
-) -> tuple[httpx.Response, dict]:
-    attempts = 2 if allow_retry else 1
-    safe_payload = sanitize_log_payload(payload)
+    circuit: str | None = None,
+    method: str | None = None,
+) -> tuple[httpx.Response, dict | list]:
+    attempts = _RETRY_POLICY.attempts if allow_retry else 1
+    delay = _RETRY_POLICY.base_delay
+    _RETRY_POLICY.record_call()
+    circuit = circuit or url
+    breaker = _circuit_breaker(circuit)
+    safe_payload = LazySafePayload(payload)
+    raw_body = _JSON.dumps(payload)
+    body, body_headers = _encode_body(raw_body)
     last_exc: Exception | None = None
 
     for attempt in range(1, attempts + 1):
+        if not breaker.allow():
+            logging.warning("%s circuit open circuit=%s attempt=%s", action, circuit, attempt)
+            raise RPCCircuitOpenError(f"Circuit open: {circuit}")
+
+        left = deadline_remaining()
+        if left is not None and left <= 0:
+            logging.warning("%s deadline exceeded attempt=%s", action, attempt)
+            raise RPCDeadlineError(f"{action}: deadline exceeded", sent=attempt > 1)
+        timeout = _deadline_timeout(left)
+
+        _POOL_STATS["requests"] += 1
+        _POOL_STATS["in_flight"] += 1
+        _POOL_STATS["peak_in_flight"] = max(_POOL_STATS["peak_in_flight"], _POOL_STATS["in_flight"])
         try:
             client = await _get_http_client()
             resp = await client.post(
                 url,
-                json=payload,
-                headers=_base_headers(),
+                content=body,
+                headers=body_headers,
+                timeout=timeout,
             )
         except httpx.RequestError as exc:
             last_exc = exc
+            pool_timeout = isinstance(exc, httpx.PoolTimeout)
+            if pool_timeout:
+                # Пул исчерпан на нашей стороне — бэкенд тут ни при чём.
+                _POOL_STATS["pool_timeouts"] += 1
+            if not pool_timeout:
+                # Ответа от бэкенда нет — это его отказ, даже если дальше будет RPCDeadlineError.
+                breaker.record(False)
+            if isinstance(exc, httpx.TimeoutException) and _deadline_spent():
+                # Таймаут урезан дедлайном, и бюджет апдейта действительно кончился.
+                logging.warning("%s deadline exceeded attempt=%s payload=%s", action, attempt, safe_payload)
+                raise RPCDeadlineError(f"{action}: deadline exceeded", sent=True)
             logging.warning(
                 "%s transport error attempt=%s payload=%s error=%s",
                 action,
@@ -116,24 +783,46 @@ async def _post_json(
                 exc.__class__.__name__,
             )
             if attempt < attempts:
-                await asyncio.sleep(0.3 * attempt)
-                continue
+                delay = _RETRY_POLICY.next_delay(delay)
+                # Сначала дедлайн, потом жетон: брошенный повтор не должен тратить бюджет.
+                if _deadline_allows(delay) and _RETRY_POLICY.acquire():
+                    _RPC_RETRIES.inc(method or action)
+                    await asyncio.sleep(delay)
+                    continue
             raise RPCTransportError(str(exc))
+        finally:
+            _POOL_STATS["in_flight"] -= 1
 
+        _RPC_BYTES.inc("request", "raw", amount=len(raw_body))
+        _RPC_BYTES.inc("request", "wire", amount=len(body))
+        _RPC_BYTES.inc("response", "raw", amount=len(resp.content))
+        _RPC_BYTES.inc("response", "wire", amount=resp.num_bytes_downloaded)
+
+        healthy = resp.status_code < 500 and resp.status_code != 429
         if resp.status_code in _RETRYABLE_STATUS_CODES and attempt < attempts:
-            logging.warning(
-                "%s retryable status=%s attempt=%s payload=%s",
-                action,
-                resp.status_code,
-                attempt,
-                safe_payload,
-            )
-            await asyncio.sleep(0.3 * attempt)
-            continue
+            retry_after = None
+            if resp.status_code in {429, 503}:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            next_delay = _RETRY_POLICY.next_delay(delay, retry_after)
+            if _deadline_allows(next_delay) and _RETRY_POLICY.acquire():
+                delay = next_delay
+                breaker.record(False)
+                _RPC_RETRIES.inc(method or action)
+                logging.warning(
+                    "%s retryable status=%s attempt=%s delay=%.2f payload=%s",
+                    action,
+                    resp.status_code,
+                    attempt,
+                    delay,
+                    safe_payload,
+                )
+                await asyncio.sleep(delay)
+                continue
 
         try:
-            data = resp.json()
+            data = _JSON.loads(resp.content)
         except ValueError:
+            breaker.record(False)
             logging.error(
                 "%s returned non-json response status=%s payload=%s",
                 action,
@@ -142,44 +831,36 @@ async def _post_json(
             )
             raise RPCTransportError(f"HTTP {resp.status_code}")
 
+        breaker.record(healthy)
         return resp, data
 
     raise RPCTransportError(str(last_exc) if last_exc else "Request failed")
 
 
-async def rpc(method: str, params: dict | None = None) -> dict:
-    """
-    Универсальный вызов JSON-RPC.
-    Возвращает УЖЕ result (а не весь JSON-RPC объект).
-    В случае ошибки бросает RPCError / RPCTransportError.
-    """
-    payload = {
+def _rpc_payload(method: str, params: dict | None = None) -> dict:
+    return {
         "jsonrpc": "2.0",
-        "id": 1,
+        "id": next(_RPC_IDS),
         "method": method,
         "params": params or {},
     }
 
-    resp, data = await _post_json(
-        RPC_URL,
-        payload,
-        action=f"rpc:{method}",
-        allow_retry=_should_retry_rpc_method(method),
-    )
 
-    if resp.status_code >= 400:
-        if "error" in data and data["error"]:
+def _rpc_result(method: str, status_code: int, data: dict):
+    if status_code >= 400:
+        # Прокси и балансировщики отвечают {"error": "..."} строкой — это не jsonrpc.error.
+        if isinstance(data.get("error"), dict):
             error = data["error"]
             logging.error(
                 "RPC logical error method=%s status=%s code=%s",
                 method,
-                resp.status_code,
+                status_code,
                 error.get("code"),
             )
             raise RPCError(data["error"])
 
-        logging.error("RPC http error method=%s status=%s", method, resp.status_code)
-        raise RPCTransportError(f"HTTP {resp.status_code}")
+        logging.error("RPC http error method=%s status=%s", method, status_code)
+        raise RPCTransportError(f"HTTP {status_code}")
 
     logging.debug("RPC success method=%s keys=%s", method, list(data.keys()) if isinstance(data, dict) else type(data).__name__)
 
@@ -187,22 +868,267 @@ async def rpc(method: str, params: dict | None = None) -> dict:
         raise RPCError(data["error"])
 
     result = data.get("result") or data
+    decoder = _RPC_DECODERS.get(method)
+    return decoder(result) if decoder is not None else result
+
+
+async def rpc(method: str, params: dict | None = None) -> Any:
+    """
+    Универсальный вызов JSON-RPC.
+    Возвращает УЖЕ result (а не весь JSON-RPC объект); для методов из
+    _RPC_DECODERS — модель из models.py.
+    В случае ошибки бросает RPCError / RPCTransportError.
+    """
+    with _observed(method):
+        return await _rpc(method, params)
+
+
+async def _rpc(method: str, params: dict | None = None) -> Any:
+    # Повторяемые методы только читают данные, их одинаковые вызовы можно объединять.
+    if not _should_retry_rpc_method(method):
+        try:
+            return await _rpc_call(method, params)
+        finally:
+            # Даже при ошибке запись могла дойти до бэкенда.
+            _invalidate_rpc_cache(method, params)
+
+    cache_key = _cache_key(method, params)
+    if cache_key is None:
+        try:
+            return await _single_flight(
+                _flight_key(f"rpc:{method}", params),
+                lambda: _rpc_call(method, params),
+            )
+        finally:
+            # Повторяемые записи вроде budget.recalculate тоже меняют данные.
+            _invalidate_rpc_cache(method, params)
+
+    user, key = cache_key
+    hit, result = _RPC_CACHE.get(user, key)
+    if hit:
+        return result
+
+    generation = _RPC_CACHE.generation(user)
+    result = await _single_flight(
+        _flight_key(f"rpc:{method}", params, generation),
+        lambda: _rpc_call(method, params),
+    )
+    _RPC_CACHE.set(user, key, result, generation)
     return result
 
 
+async def _rpc_call(method: str, params: dict | None = None) -> Any:
+    payload = _rpc_payload(method, params)
+    family = _rpc_family(method)
+
+    async with _admitted(family, _params_user(params), _rpc_circuit(method)):
+        with _backend_timed(method):
+            resp, data = await _send_hedged(
+                method,
+                lambda: _post_json(
+                    RPC_URL,
+                    payload,
+                    action=f"rpc:{method}",
+                    allow_retry=_may_retry_call(method, params),
+                    circuit=_rpc_circuit(method),
+                    method=method,
+                ),
+                hedge=_should_hedge_rpc_method(method),
+                family=family,
+            )
+
+    return _rpc_result(method, resp.status_code, data)
+
+
+async def _rpc_each(calls: list[tuple[str, dict | None]]) -> list:
+    async def one(method: str, params: dict | None):
+        try:
+            return await _rpc(method, params)
+        except RPCError as exc:
+            return exc
+
+    return list(await asyncio.gather(*(one(method, params) for method, params in calls)))
+
+
+async def rpc_batch(calls: list[tuple[str, dict | None]]) -> list:
+    """
+    Пакетный вызов JSON-RPC 2.0: несколько методов одним HTTP-запросом.
+    Возвращает список в порядке calls: result либо RPCError для каждого вызова.
+    Сетевая ошибка всего пакета бросает RPCTransportError.
+    """
+    if not calls:
+        return []
+
+    with _observed("rpc.batch"):
+        results = await _rpc_batch(calls)
+
+    for (method, _), result in zip(calls, results):
+        if isinstance(result, RPCError):
+            _RPC_ERRORS.inc(method, "rpc")
+    return results
+
+
+async def _rpc_batch(calls: list[tuple[str, dict | None]]) -> list:
+
+    if not all(_should_retry_rpc_method(method) for method, _ in calls):
+        try:
+            return await _rpc_batch_call(calls)
+        finally:
+            for method, params in calls:
+                _invalidate_rpc_cache(method, params)
+
+    results: list = [None] * len(calls)
+    pending: list[tuple[int, tuple | None, int]] = []
+    for index, (method, params) in enumerate(calls):
+        cache_key = _cache_key(method, params)
+        if cache_key is not None:
+            hit, results[index] = _RPC_CACHE.get(*cache_key)
+            if hit:
+                continue
+            pending.append((index, cache_key, _RPC_CACHE.generation(cache_key[0])))
+        else:
+            pending.append((index, None, 0))
+
+    if not pending:
+        return results
+
+    pending_calls = [calls[index] for index, _, _ in pending]
+    try:
+        fetched = await _single_flight(
+            _flight_key("rpc_batch", pending_calls, tuple(generation for _, _, generation in pending)),
+            lambda: _rpc_batch_call(pending_calls),
+        )
+    finally:
+        for method, params in pending_calls:
+            _invalidate_rpc_cache(method, params)
+    for (index, cache_key, generation), result in zip(pending, fetched):
+        results[index] = result
+        if cache_key is not None and not isinstance(result, RPCError):
+            _RPC_CACHE.set(*cache_key, result, generation)
+
+    return results
+
+
+async def _rpc_batch_call(calls: list[tuple[str, dict | None]]) -> list:
+    payloads = [_rpc_payload(method, params) for method, params in calls]
+    methods = ",".join(method for method, _ in calls)
+    family = _batch_family(calls)
+
+    async with _admitted(family, _call_user(calls), RPC_URL):
+        # Каждый вызов пакета ждал весь пакет — так его задержка сравнима с одиночным rpc().
+        with _backend_timed("rpc.batch", *(method for method, _ in calls)):
+            resp, data = await _send_hedged(
+                # Окно задержек по семейству: у outbox и меню пакеты из любых сочетаний методов.
+                f"batch:{family}",
+                lambda: _post_json(
+                    RPC_URL,
+                    payloads,
+                    action=f"rpc_batch:{methods}",
+                    allow_retry=all(_may_retry_call(method, params) for method, params in calls),
+                    method="rpc.batch",
+                ),
+                hedge=all(_should_hedge_rpc_method(method) for method, _ in calls),
+                family=family,
+            )
+
+    if not isinstance(data, list):
+        if resp.status_code >= 400 and not (isinstance(data, dict) and isinstance(data.get("error"), dict)):
+            logging.error("RPC batch http error methods=%s status=%s", methods, resp.status_code)
+            raise RPCTransportError(f"HTTP {resp.status_code}")
+        # Бэкенд без поддержки batch отвечает одиночной ошибкой — шлём вызовы по отдельности.
+        logging.warning("RPC batch not supported status=%s methods=%s", resp.status_code, methods)
+        return await _rpc_each(calls)
+
+    by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+    results = []
+    for (method, _), payload in zip(calls, payloads):
+        item = by_id.get(payload["id"])
+        if item is None:
+            logging.error("RPC batch missing response method=%s", method)
+            results.append(RPCError({"code": -32603, "message": "Missing batch response"}))
+            continue
+        try:
+            results.append(_rpc_result(method, resp.status_code, item))
+        except RPCError as exc:
+            results.append(exc)
+
+    return results
+
+
+async def rpc_job(method: str, params: dict | None = None) -> Any:
+    """
+    Долгий вызов через задание бэкенда: job.submit ставит его в очередь,
+    затем job.get опрашивается с растущим интервалом до результата.
+    HTTP-соединение занято только на время коротких запросов опроса.
+    Нет job API на бэкенде (Method not found) — обычный вызов метода.
+    Не дождались за RPC_JOB_TIMEOUT — RPCTransportError.
+    Такой же вызов, пока задание в работе (повторное нажатие), нового
+    задания не ставит, а ждёт результат уже запущенного.
+    """
+    with _observed(method):
+        return await _single_flight(
+            _flight_key(f"job:{method}", params),
+            lambda: _rpc_job(method, params),
+        )
+
+
+async def _rpc_job(method: str, params: dict | None = None) -> Any:
+    global _JOBS_SUPPORTED
+
+    if not RPC_JOBS_ENABLED or _JOBS_SUPPORTED is False:
+        return await _rpc(method, params)
+
+    try:
+        job = await rpc("job.submit", {"method": method, "params": params or {}})
+    except RPCError as exc:
+        if exc.error.get("code") != -32601:
+            raise
+        logging.warning("Backend has no job API, calling %s directly", method)
+        _JOBS_SUPPORTED = False
+        return await _rpc(method, params)
+    _JOBS_SUPPORTED = True
+
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + RPC_JOB_TIMEOUT
+    delay = RPC_JOB_POLL_INTERVAL
+    # Задержка метода — время выполнения задания на бэкенде.
+    with _backend_timed(method):
+        while job.get("status") in _JOB_PENDING_STATUSES:
+            if loop.time() + delay > expires_at:
+                logging.error("RPC job timed out method=%s job_id=%s", method, job.get("job_id"))
+                raise RPCTransportError(f"Job {method} timed out")
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, RPC_JOB_POLL_MAX_INTERVAL)
+            job = await rpc("job.get", {"job_id": job.get("job_id")})
+
+    if job.get("status") != "done":
+        raise RPCError(job.get("error") or {"code": -32603, "message": f"Job {job.get('status')}"})
+
+    decoder = _RPC_DECODERS.get(method)
+    result = job.get("result") or {}
+    return decoder(result) if decoder is not None else result
+
+
 async def telegram_register(tg_user_id: int, phone: str, name: str | None = None) -> dict:
+    with _observed("telegram_register"):
+        return await _telegram_register(tg_user_id, phone, name)
+
+
+async def _telegram_register(tg_user_id: int, phone: str, name: str | None = None) -> dict:
     payload = {
         "tg_user_id": tg_user_id,
         "phone": phone,
         "name": name,
     }
 
-    resp, data = await _post_json(
-        TELEGRAM_REGISTER_URL,
-        payload,
-        action="telegram_register",
-        allow_retry=False,
-    )
+    async with _admitted("write", tg_user_id, TELEGRAM_REGISTER_URL):
+        with _backend_timed("telegram_register"):
+            resp, data = await _post_json(
+                TELEGRAM_REGISTER_URL,
+                payload,
+                action="telegram_register",
+                allow_retry=False,
+            )
 
     if resp.status_code >= 400 or data.get("status") == "error":
         code = data.get("code") or "registration_failed"
@@ -211,7 +1137,7 @@ async def telegram_register(tg_user_id: int, phone: str, name: str | None = None
             "Registration error status=%s code=%s payload=%s",
             resp.status_code,
             code,
-            sanitize_log_payload(payload),
+            LazySafePayload(payload),
         )
         raise RegistrationError(code, message)
 
@@ -219,19 +1145,53 @@ async def telegram_register(tg_user_id: int, phone: str, name: str | None = None
 
 
 async def telegram_status(tg_user_id: int) -> dict:
+    with _observed("telegram_status"):
+        # Во время сбоя апдейты сразу уходят в деградированный путь, не дожидаясь таймаутов.
+        for scope, failures, key in (("global", _STATUS_OUTAGE, None), ("user", _STATUS_FAILURES, tg_user_id)):
+            retry_in = failures.retry_in(key)
+            if retry_in > 0:
+                _RPC_NEGATIVE_HITS.inc(scope)
+                raise RPCBackoffError(f"telegram_status: retry in {retry_in:.1f}s")
+
+        try:
+            status = await _single_flight(
+                ("telegram_status", str(tg_user_id)),
+                lambda: _telegram_status(tg_user_id),
+            )
+        except RPCOverloadedError:
+            # Сработал наш ограничитель — бэкенд тут ни при чём.
+            raise
+        except RPCDeadlineError as exc:
+            # Бюджет кончился до отправки — бэкенд не виноват; зависший запрос — его отказ.
+            if exc.sent:
+                _STATUS_FAILURES.failed(tg_user_id)
+                _STATUS_OUTAGE.failed(None)
+            raise
+        except RPCTransportError:
+            _STATUS_FAILURES.failed(tg_user_id)
+            _STATUS_OUTAGE.failed(None)
+            raise
+        _STATUS_FAILURES.succeeded(tg_user_id)
+        _STATUS_OUTAGE.succeeded(None)
+        return status
+
+
+async def _telegram_status(tg_user_id: int) -> dict:
     payload = {"tg_user_id": tg_user_id}
-    resp, data = await _post_json(
-        TELEGRAM_STATUS_URL,
-        payload,
-        action="telegram_status",
-        allow_retry=True,
-    )
+    async with _admitted("read", tg_user_id, TELEGRAM_STATUS_URL):
+        with _backend_timed("telegram_status"):
+            resp, data = await _post_json(
+                TELEGRAM_STATUS_URL,
+                payload,
+                action="telegram_status",
+                allow_retry=True,
+            )
 
     if resp.status_code >= 400 or data.get("status") != "ok":
         logging.error(
             "Registration status error status=%s payload=%s",
             resp.status_code,
-            sanitize_log_payload(payload),
+            LazySafePayload(payload),
         )
         raise RPCTransportError(f"HTTP {resp.status_code}")
 
@@ -243,42 +1203,42 @@ async def telegram_status(tg_user_id: int) -> dict:
 
 
 async def telegram_set_language(tg_user_id: int, language: str) -> dict:
+    with _observed("telegram_set_language"):
+        return await _telegram_set_language(tg_user_id, language)
+
+
+async def _telegram_set_language(tg_user_id: int, language: str) -> dict:
     payload = {"tg_user_id": tg_user_id, "language": language}
-    resp, data = await _post_json(
-        TELEGRAM_SET_LANGUAGE_URL,
-        payload,
-        action="telegram_set_language",
-        allow_retry=True,
-    )
+    async with _admitted("write", tg_user_id, TELEGRAM_SET_LANGUAGE_URL):
+        with _backend_timed("telegram_set_language"):
+            resp, data = await _post_json(
+                TELEGRAM_SET_LANGUAGE_URL,
+                payload,
+                action="telegram_set_language",
+                allow_retry=True,
+            )
 
     if resp.status_code >= 400 or data.get("status") != "ok":
         logging.error(
             "Set language error status=%s payload=%s",
             resp.status_code,
-            sanitize_log_payload(payload),
+            LazySafePayload(payload),
         )
         raise RPCTransportError(f"HTTP {resp.status_code}")
 
     return data
 
 
-async def currency_list(tg_user_id: int) -> list[dict]:
-    result = await rpc("currency.list", {"tg_user_id": tg_user_id})
-    return result.get("data", []) if isinstance(result, dict) else []
+async def currency_list(tg_user_id: int) -> tuple[Currency, ...]:
+    return await rpc("currency.list", {"tg_user_id": tg_user_id})
 
 
-async def currency_get(tg_user_id: int) -> dict | None:
-    result = await rpc("currency.get", {"tg_user_id": tg_user_id})
-    if not isinstance(result, dict):
-        return None
-    return result.get("data")
+async def currency_get(tg_user_id: int) -> Currency | None:
+    return await rpc("currency.get", {"tg_user_id": tg_user_id})
 
 
-async def currency_set(tg_user_id: int, currency_code: str) -> dict | None:
-    result = await rpc("currency.set", {
+async def currency_set(tg_user_id: int, currency_code: str) -> Currency | None:
+    return await rpc("currency.set", {
         "tg_user_id": tg_user_id,
         "currency_code": currency_code,
     })
-    if not isinstance(result, dict):
-        return None
-    return result.get("data")
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import aiosqlite
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class OutboxEntry:
+    id: int
+    method: str
+    params: dict
+    attempts: int = 0
+
+
+class OutboxStore:
+    """
+    Очередь записей, не дошедших до бэкенда, в SQLite: переживает
+    перезапуск бота. pending — ждут отправки, rejected — бэкенд их
+    отклонил (RPCError), failed — так и не дошли за OUTBOX_MAX_ATTEMPTS
+    попыток; rejected и failed хранятся для разбора.
+    """
+
+    def __init__(self, path: str = "data/outbox.sqlite3"):
+        self.path = Path(path)
+        self.pending_count = 0
+        self._db: aiosqlite.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def _conn(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = await aiosqlite.connect(self.path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(_SCHEMA)
+                await db.commit()
+                async with db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'") as cursor:
+                    (self.pending_count,) = await cursor.fetchone()
+                self._db = db
+            return self._db
+
+    async def add(self, method: str, params: dict) -> int:
+        db = await self._conn()
+        cursor = await db.execute(
+            "INSERT INTO outbox (method, params, created_at) VALUES (?, ?, ?)",
+            (method, json.dumps(params, ensure_ascii=False, default=str), time.time()),
+        )
+        await db.commit()
+        self.pending_count += 1
+        return cursor.lastrowid
+
+    async def pending(self, limit: int) -> list[OutboxEntry]:
+        db = await self._conn()
+        async with db.execute(
+            "SELECT id, method, params, attempts FROM outbox WHERE status = 'pending' ORDER BY id LIMIT ?",
+            (limit,),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    async def delete(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        db = await self._conn()
+        await db.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in ids])
+        await db.commit()
+        self.pending_count = max(0, self.pending_count - len(ids))
+
+    async def reject(self, entry_id: int, error: str) -> None:
+        await self._finish(entry_id, "rejected", error)
+
+    async def fail(self, entry_id: int, error: str) -> None:
+        await self._finish(entry_id, "failed", error)
+
+    async def _finish(self, entry_id: int, status: str, error: str) -> None:
+        db = await self._conn()
+        await db.execute(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+            (status, error, entry_id),
+        )
+        await db.commit()
+        self.pending_count = max(0, self.pending_count - 1)
+
+    async def retry_later(self, ids: list[int], error: str) -> None:
+        if not ids:
+            return
+        db = await self._conn()
+        await db.executemany(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+            [(error, entry_id) for entry_id in ids],
+        )
+        await db.commit()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
+
+
+store = OutboxStore()
@@ -0,0 +1,31 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def hung_url():
+    """
+    URL сервера, который принимает соединения и никогда не отвечает.
+    Сервер живёт в своём потоке, чтобы тест мог запускать asyncio.run.
+    """
+    loop = asyncio.new_event_loop()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+
+    async def hang(reader, writer):
+        try:
+            await reader.read()
+        finally:
+            writer.close()
+
+    server = loop.run_until_complete(asyncio.start_server(hang, sock=sock))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}"
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
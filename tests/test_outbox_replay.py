@@ -0,0 +1,39 @@
+import asyncio
+
+import outbox
+from rpc import RPCTransportError
+from storage.outbox_store import OutboxStore
+
+
+def test_failing_entry_does_not_block_the_rest(monkeypatch, tmp_path):
+    store = OutboxStore(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(outbox, "store", store)
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    sent = []
+
+    async def rpc_batch(calls):
+        # Бэкенд падает на любом пакете с «плохой» записью.
+        if any(params.get("bad") for _, params in calls):
+            raise RPCTransportError("HTTP 502")
+        sent.extend(params["n"] for _, params in calls)
+        return [{} for _ in calls]
+
+    monkeypatch.setattr(outbox, "rpc_batch", rpc_batch)
+
+    async def scenario():
+        try:
+            await store.add("transaction.import", {"n": 0, "bad": True})
+            for n in range(1, 4):
+                await store.add("transaction.import", {"n": n})
+            await outbox.replay_once()
+            await store.add("transaction.import", {"n": 4})
+            await outbox.replay_once()
+            return store.pending_count, await store.pending(10)
+        finally:
+            await store.close()
+
+    pending_count, pending = asyncio.run(scenario())
+
+    assert sent == [1, 2, 3, 4]
+    assert pending_count == 0
+    assert pending == []
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+import rpc
+from utils.deadline import deadline
+from utils.limits import KeyedRateLimiter
+
+
+def test_circuit_opens_for_hung_backend_under_deadline(monkeypatch, hung_url):
+    monkeypatch.setattr(rpc, "_CIRCUIT_BREAKERS", {})
+    monkeypatch.setattr(rpc, "RPC_BREAKER_MIN_CALLS", 3)
+    monkeypatch.setattr(rpc, "RPC_URL", f"{hung_url}/rpc")
+
+    async def scenario():
+        errors = []
+        try:
+            for _ in range(5):
+                with deadline(0.3):
+                    with pytest.raises(rpc.RPCTransportError) as exc_info:
+                        await rpc.rpc("goal.list", {})
+                errors.append(type(exc_info.value))
+                # Запрос в полёте (single-flight) записывает исход чуть позже ожидающего.
+                await asyncio.sleep(0.05)
+        finally:
+            await rpc.close_http_client()
+        return errors
+
+    errors = asyncio.run(scenario())
+
+    assert errors[:3] == [rpc.RPCDeadlineError] * 3
+    assert rpc.circuit_states()["rpc:goal"] == "open"
+    assert errors[-1] is rpc.RPCCircuitOpenError
+
+
+def test_open_circuit_rejects_before_user_limiter(monkeypatch):
+    breaker = rpc._circuit_breaker("rpc:goal")
+    monkeypatch.setattr(rpc, "_CIRCUIT_BREAKERS", {"rpc:goal": breaker})
+    monkeypatch.setattr(rpc, "_USER_LIMITER", KeyedRateLimiter(0.01, 1))
+    breaker._open()
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(rpc.RPCCircuitOpenError):
+                await rpc.rpc("goal.list", {"tg_user_id": 42})
+
+    asyncio.run(scenario())
+
+    # Жетон пользователя не потрачен: после закрытия цепи запрос пройдёт сразу.
+    assert rpc._USER_LIMITER.reserve(42, 0) == 0
@@ -0,0 +1,62 @@
+import asyncio
+
+import rpc
+from utils.cache import UserTTLCache
+
+
+def test_read_after_write_does_not_join_older_read(monkeypatch):
+    monkeypatch.setattr(rpc, "_RPC_CACHE", UserTTLCache(60))
+    monkeypatch.setattr(rpc, "_IN_FLIGHT", {})
+    params = {"tg_user_id": 42, "goal_id": 1}
+    balances = iter([100, 150])
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def rpc_call(method, call_params):
+            balance = next(balances)
+            if balance == 100:
+                # Чтение, начатое до пополнения, отвечает последним.
+                await release.wait()
+            return {"balance": balance}
+
+        monkeypatch.setattr(rpc, "_rpc_call", rpc_call)
+        before = asyncio.ensure_future(rpc._rpc("goal.get", params))
+        await asyncio.sleep(0)
+        rpc._invalidate_rpc_cache("goal.deposit", params)
+        try:
+            after = await asyncio.wait_for(rpc._rpc("goal.get", params), 1)
+        finally:
+            release.set()
+        await before
+        cached = await rpc._rpc("goal.get", params)
+        return after, cached
+
+    after, cached = asyncio.run(scenario())
+
+    assert after == {"balance": 150}
+    assert cached == {"balance": 150}
+
+
+def test_recalculate_invalidates_budget_but_preview_does_not(monkeypatch):
+    monkeypatch.setattr(rpc, "_RPC_CACHE", UserTTLCache(60))
+    monkeypatch.setattr(rpc, "_IN_FLIGHT", {})
+    calls = []
+
+    async def rpc_call(method, params):
+        calls.append(method)
+        return {"n": len(calls)}
+
+    monkeypatch.setattr(rpc, "_rpc_call", rpc_call)
+    user = {"tg_user_id": 42}
+
+    async def scenario():
+        await rpc._rpc("budget.getMonth", user)
+        await rpc._rpc("smart.save.run", {**user, "preview": True})
+        await rpc._rpc("budget.getMonth", user)
+        await rpc._rpc("budget.recalculate", user)
+        await rpc._rpc("budget.getMonth", user)
+
+    asyncio.run(scenario())
+
+    assert calls == ["budget.getMonth", "smart.save.run", "budget.recalculate", "budget.getMonth"]
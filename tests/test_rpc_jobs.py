@@ -0,0 +1,36 @@
+import asyncio
+from types import SimpleNamespace
+
+import rpc
+from utils.limits import KeyedRateLimiter
+
+
+def test_repeated_job_joins_running_one_and_charges_user(monkeypatch):
+    monkeypatch.setattr(rpc, "_IN_FLIGHT", {})
+    monkeypatch.setattr(rpc, "_CIRCUIT_BREAKERS", {})
+    monkeypatch.setattr(rpc, "_JOBS_SUPPORTED", None)
+    monkeypatch.setattr(rpc, "RPC_JOB_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(rpc, "_USER_LIMITER", KeyedRateLimiter(0.01, 1))
+    sent = []
+
+    async def send_hedged(key, send, hedge, family):
+        sent.append(key)
+        if key == "job.submit":
+            return SimpleNamespace(status_code=200), {"result": {"job_id": "j1", "status": "pending"}}
+        return SimpleNamespace(status_code=200), {"result": {"job_id": "j1", "status": "done", "result": {"insight": "ok"}}}
+
+    monkeypatch.setattr(rpc, "_send_hedged", send_hedged)
+
+    async def scenario():
+        params = {"tg_user_id": 42}
+        return await asyncio.gather(
+            rpc.rpc_job("ai.insight.daily", params),
+            rpc.rpc_job("ai.insight.daily", params),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert results == [{"insight": "ok"}, {"insight": "ok"}]
+    assert sent == ["job.submit", "job.get"]
+    # job.submit взял жетон пользователя из вложенных параметров задания.
+    assert rpc._USER_LIMITER.reserve(42, 0) is None
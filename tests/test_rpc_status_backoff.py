@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+import rpc
+from utils.cache import NegativeCache
+from utils.deadline import deadline
+
+
+def test_hung_status_lookup_backs_off(monkeypatch, hung_url):
+    monkeypatch.setattr(rpc, "_CIRCUIT_BREAKERS", {})
+    monkeypatch.setattr(rpc, "_STATUS_FAILURES", NegativeCache(5, 30))
+    monkeypatch.setattr(rpc, "_STATUS_OUTAGE", NegativeCache(5, 30, threshold=3))
+    monkeypatch.setattr(rpc, "TELEGRAM_STATUS_URL", f"{hung_url}/telegram/status")
+
+    async def scenario():
+        errors = []
+        try:
+            for _ in range(4):
+                with deadline(0.3):
+                    with pytest.raises(rpc.RPCTransportError) as exc_info:
+                        await rpc.telegram_status(42)
+                errors.append(type(exc_info.value))
+        finally:
+            await rpc.close_http_client()
+        return errors
+
+    errors = asyncio.run(scenario())
+
+    assert errors == [rpc.RPCDeadlineError] + [rpc.RPCBackoffError] * 3
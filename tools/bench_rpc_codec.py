@@ -0,0 +1,82 @@
+# tools/bench_rpc_codec.py
+"""
+Микробенчмарк горячего пути rpc._post_json: кодирование запроса,
+разбор ответа goal.list и сборка заголовков.
+
+Запуск: python -m tools.bench_rpc_codec [--goals 20] [--number 20000]
+"""
+import argparse
+import json
+import timeit
+
+import httpx
+
+from rpc import _base_headers
+from utils.jsoncodec import ORJSON_CODEC, STDLIB_CODEC
+
+
+def goal_list_response(goals: int) -> bytes:
+    items = []
+    for index in range(goals):
+        items.append({
+            "id": index + 1,
+            "title": f"Цель №{index + 1}",
+            "icon": "🎯",
+            "amount_total": "15000000.00",
+            "amount_saved": f"{index * 125000}.00",
+            "progress": round(index * 100 / max(goals, 1), 2),
+            "deadline": "2026-12-31",
+            "is_primary": index == 0,
+            "status": "active",
+            "priority": index + 1,
+            "currency": {"code": "UZS", "name": "Uzbekistan Som", "symbol": "сум"},
+        })
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"goals": items}}, ensure_ascii=False).encode("utf-8")
+
+
+def request_payload() -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "method": "goal.list", "params": {"tg_user_id": 123456789}}
+
+
+def bench(label: str, func, number: int, baseline: float | None = None) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call = seconds / number * 1e6
+    speedup = f"  x{baseline / per_call:.1f}" if baseline else ""
+    print(f"  {label:<34} {per_call:8.2f} µs/call{speedup}")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--goals", type=int, default=20, help="goals in the goal.list response")
+    parser.add_argument("--number", type=int, default=20000, help="calls per measurement")
+    args = parser.parse_args()
+
+    payload = request_payload()
+    body = goal_list_response(args.goals)
+    response = httpx.Response(200, content=body)
+    print(f"goal.list response: {args.goals} goals, {len(body)} bytes\n")
+
+    print("request encoding")
+    base = bench("httpx json= (stdlib json.dumps)", lambda: json.dumps(payload).encode("utf-8"), args.number)
+    for codec in (STDLIB_CODEC, ORJSON_CODEC):
+        if codec is not None:
+            bench(f"codec {codec.name}", lambda codec=codec: codec.dumps(payload), args.number, base)
+
+    print("\nresponse decoding")
+    base = bench("httpx resp.json()", response.json, args.number)
+    for codec in (STDLIB_CODEC, ORJSON_CODEC):
+        if codec is not None:
+            bench(f"codec {codec.name}", lambda codec=codec: codec.loads(response.content), args.number, base)
+
+    print("\nheaders")
+    headers = _base_headers()
+    base = bench("_base_headers() per request", _base_headers, args.number)
+    bench("prebuilt on client", lambda: headers, args.number, base)
+
+    if ORJSON_CODEC is None:
+        print("\norjson is not installed: pip install orjson to compare.")
+
+
+if __name__ == "__main__":
+    main()
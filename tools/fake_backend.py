@@ -0,0 +1,599 @@
+# tools/fake_backend.py
+"""
+Локальный фейковый JSON-RPC бэкенд для нагрузочных тестов без продакшена.
+
+Реализует все методы, которые вызывает бот (goal.*, budget.*, transaction.*,
+smart.save.run, ai.*, currency.*, user.register, job.submit/job.get)
+и /telegram/register|status|set-language.
+Состояние хранится в памяти по пользователям; задержки и ошибки настраиваются.
+Запросы с params["idempotency_key"] применяются один раз: повтор с тем же
+ключом получает сохранённый ответ. --lost-response-rate выполняет запрос,
+но отвечает 502 — так проверяются повторы записей.
+Ответы RPC от --compress-min-bytes сжимаются, если клиент прислал Accept-Encoding;
+тела запросов с Content-Encoding: gzip aiohttp распаковывает сам.
+
+Запуск: python -m tools.fake_backend --port 5136 --latency 20 --latency ai.=1500 --error-rate 0.01
+Затем BACKEND_BASE_URL=http://127.0.0.1:5136/api для бота.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import calendar
+import itertools
+import json
+import logging
+import math
+import random
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from aiohttp import web
+
+CURRENCIES = [
+    {"id": 1, "code": "UZS", "name": "Uzbekistan Som", "symbol": "сум", "is_default": True},
+    {"id": 2, "code": "USD", "name": "US Dollar", "symbol": "$", "is_default": False},
+    {"id": 3, "code": "EUR", "name": "Euro", "symbol": "€", "is_default": False},
+    {"id": 4, "code": "RUB", "name": "Russian Ruble", "symbol": "₽", "is_default": False},
+]
+_CURRENCY_BY_CODE = {item["code"]: item for item in CURRENCIES}
+_IDEMPOTENCY_LIMIT = 100_000
+
+
+class RPCFault(Exception):
+    def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
+        super().__init__(message)
+
+
+@dataclass
+class LatencyModel:
+    """
+    Логнормальная задержка: медиана median_ms, хвост задаётся sigma.
+    overrides — медианы по префиксу метода (например, "ai." -> 1500).
+    """
+
+    median_ms: float = 0.0
+    sigma: float = 0.5
+    overrides: dict[str, float] = field(default_factory=dict)
+
+    def sample(self, method: str) -> float:
+        median = self.median_ms
+        for prefix, value in self.overrides.items():
+            if method.startswith(prefix):
+                median = value
+                break
+        if median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(median), self.sigma) / 1000
+
+
+@dataclass
+class FaultModel:
+    http_error_rate: float = 0.0
+    rpc_error_rate: float = 0.0
+    retry_after: float | None = None
+    lost_response_rate: float = 0.0
+
+
+@dataclass
+class UserState:
+    registered: bool = False
+    phone: str | None = None
+    name: str | None = None
+    language: str | None = None
+    currency: dict = field(default_factory=lambda: dict(CURRENCIES[0]))
+    goals: dict[int, dict] = field(default_factory=dict)
+    transactions: list[dict] = field(default_factory=list)
+    previews: dict[str, dict] = field(default_factory=dict)
+
+
+class FakeBackend:
+    def __init__(
+        self,
+        latency: LatencyModel | None = None,
+        faults: FaultModel | None = None,
+        token: str | None = None,
+        jobs: bool = True,
+        compress_min_bytes: int = 1024,
+    ):
+        self.latency = latency or LatencyModel()
+        self.faults = faults or FaultModel()
+        self.token = token
+        self.compress_min_bytes = compress_min_bytes
+        self.users: dict[int, UserState] = {}
+        self.calls: Counter[str] = Counter()
+        self.jobs: dict[str, asyncio.Task] = {}
+        self.idempotency: OrderedDict[tuple, object] = OrderedDict()
+        self._goal_ids = itertools.count(1)
+        self._methods = {
+            "user.register": self.user_register,
+            "goal.list": self.goal_list,
+            "goal.get": self.goal_get,
+            "goal.create": self.goal_create,
+            "goal.deposit": self.goal_deposit,
+            "goal.close": self.goal_close,
+            "goal.reopen": self.goal_reopen,
+            "goal.setPrimary": self.goal_set_primary,
+            "goal.priority.up": self.goal_priority_up,
+            "goal.priority.down": self.goal_priority_down,
+            "budget.getMonth": self.budget_get_month,
+            "budget.recalculate": self.budget_get_month,
+            "transaction.getDaily": self.transaction_get_daily,
+            "transaction.import": self.transaction_import,
+            "smart.save.run": self.smart_save_run,
+            "ai.transaction.analysis": self.ai_transaction_analysis,
+            "ai.insight.daily": self.ai_insight_daily,
+            "ai.goal.analysis": self.ai_goal_analysis,
+            "currency.list": self.currency_list,
+            "currency.get": self.currency_get,
+            "currency.set": self.currency_set,
+        }
+        if jobs:
+            self._methods["job.submit"] = self.job_submit
+            self._methods["job.get"] = self.job_get
+
+    # ---- инфраструктура ----
+
+    def user(self, params: dict) -> UserState:
+        try:
+            tg_user_id = int(params["tg_user_id"])
+        except (KeyError, TypeError, ValueError):
+            raise RPCFault(-32602, "tg_user_id is required")
+        state = self.users.get(tg_user_id)
+        if state is None:
+            state = self.users[tg_user_id] = UserState()
+        return state
+
+    def goal(self, state: UserState, params: dict) -> dict:
+        try:
+            goal = state.goals[int(params.get("goal_id"))]
+        except (KeyError, TypeError, ValueError):
+            raise RPCFault(404, "Goal not found")
+        return goal
+
+    async def delay(self, method: str) -> None:
+        seconds = self.latency.sample(method)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def http_fault(self) -> web.Response | None:
+        if self.faults.http_error_rate and random.random() < self.faults.http_error_rate:
+            headers = {}
+            if self.faults.retry_after is not None:
+                headers["Retry-After"] = str(self.faults.retry_after)
+            return web.json_response({"error": "Service Unavailable"}, status=503, headers=headers)
+        return None
+
+    def authorized(self, request: web.Request) -> bool:
+        return not self.token or request.headers.get("Authorization") == f"Bearer {self.token}"
+
+    async def call(self, payload: dict) -> dict:
+        request_id = payload.get("id") if isinstance(payload, dict) else None
+        method = payload.get("method") if isinstance(payload, dict) else None
+        handler = self._methods.get(method)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32601, "message": "Method not found"}}
+
+        self.calls[method] += 1
+        await self.delay(method)
+        if self.faults.rpc_error_rate and random.random() < self.faults.rpc_error_rate:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32000, "message": "Injected error"}}
+        params = payload.get("params") or {}
+        replay_key = None
+        if isinstance(params, dict) and params.get("idempotency_key"):
+            replay_key = (params.get("tg_user_id"), method, params["idempotency_key"])
+            if replay_key in self.idempotency:
+                self.calls["idempotent.replay"] += 1
+                return {"jsonrpc": "2.0", "id": request_id, "result": self.idempotency[replay_key]}
+        try:
+            result = handler(params)
+        except RPCFault as fault:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": fault.code, "message": fault.message}}
+        if replay_key is not None:
+            self.idempotency[replay_key] = result
+            if len(self.idempotency) > _IDEMPOTENCY_LIMIT:
+                self.idempotency.popitem(last=False)
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def lost_response(self) -> web.Response | None:
+        # Запрос уже выполнен, но ответ до клиента не дошёл.
+        if self.faults.lost_response_rate and random.random() < self.faults.lost_response_rate:
+            self.calls["lost_response"] += 1
+            return web.json_response({"error": "Bad Gateway"}, status=502)
+        return None
+
+    # ---- HTTP ----
+
+    async def handle_rpc(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        fault = self.http_fault()
+        if fault is not None:
+            return fault
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.json_response({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}, status=400)
+
+        if isinstance(body, list):
+            self.calls["rpc.batch"] += 1
+            response = list(await asyncio.gather(*(self.call(item) for item in body)))
+        else:
+            response = await self.call(body)
+        lost = self.lost_response()
+        if lost is not None:
+            return lost
+        resp = web.json_response(response)
+        if self.compress_min_bytes and len(resp.body) >= self.compress_min_bytes:
+            resp.enable_compression()
+        return resp
+
+    async def handle_telegram(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        action = request.match_info["action"]
+        self.calls[f"telegram.{action}"] += 1
+        await self.delay(f"telegram.{action}")
+        fault = self.http_fault()
+        if fault is not None:
+            return fault
+
+        try:
+            body = await request.json()
+            state = self.user(body)
+        except (json.JSONDecodeError, UnicodeDecodeError, RPCFault):
+            return web.json_response({"status": "error", "code": "bad_request", "message": "tg_user_id is required"}, status=400)
+
+        if action == "status":
+            return web.json_response({
+                "status": "ok",
+                "registered": state.registered,
+                "language": state.language,
+                "currency": state.currency,
+            })
+        if action == "set-language":
+            state.language = body.get("language")
+            return web.json_response({"status": "ok", "language": state.language})
+        if action == "register":
+            phone = "".join(ch for ch in str(body.get("phone") or "") if ch.isdigit())
+            if len(phone) < 7:
+                return web.json_response({"status": "error", "code": "invalid_phone", "message": "Invalid phone"}, status=422)
+            owner = next((uid for uid, user in self.users.items() if user.phone == phone and user is not state), None)
+            if owner is not None:
+                return web.json_response({"status": "error", "code": "phone_in_use", "message": "Phone in use"}, status=409)
+            state.registered = True
+            state.phone = phone
+            state.name = body.get("name")
+            return web.json_response({"status": "ok", "registered": True})
+        return web.json_response({"status": "error", "code": "not_found", "message": "Unknown endpoint"}, status=404)
+
+    async def handle_stats(self, _request: web.Request) -> web.Response:
+        return web.json_response({"users": len(self.users), "calls": dict(self.calls)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/rpc", self.handle_rpc)
+        app.router.add_post("/api/telegram/{action}", self.handle_telegram)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    # ---- user / goal ----
+
+    def user_register(self, params: dict) -> dict:
+        state = self.user(params)
+        state.name = params.get("name") or state.name
+        return {
+            "is_first_run": not state.goals and not state.transactions,
+            "has_goals": bool(state.goals),
+            "has_any_transactions": bool(state.transactions),
+            "has_budget_this_month": bool(self._month_totals(state, date.today().strftime("%Y-%m"))[0]),
+        }
+
+    def _goal_view(self, state: UserState, goal: dict) -> dict:
+        total = goal["amount_total"]
+        progress = round(goal["amount_saved"] / total * 100, 2) if total else 0
+        return {**goal, "progress": progress, "currency": goal.get("currency") or state.currency}
+
+    def goal_list(self, params: dict) -> dict:
+        state = self.user(params)
+        goals = sorted(state.goals.values(), key=lambda goal: goal["priority"])
+        return {"goals": [self._goal_view(state, goal) for goal in goals]}
+
+    def goal_get(self, params: dict) -> dict:
+        state = self.user(params)
+        return self._goal_view(state, self.goal(state, params))
+
+    def goal_create(self, params: dict) -> dict:
+        state = self.user(params)
+        try:
+            amount_total = float(params.get("amount_total"))
+        except (TypeError, ValueError):
+            raise RPCFault(422, "amount_total is invalid")
+        goal_id = next(self._goal_ids)
+        state.goals[goal_id] = {
+            "id": goal_id,
+            "title": params.get("title") or "Goal",
+            "icon": params.get("icon") or "🎯",
+            "amount_total": amount_total,
+            "amount_saved": 0.0,
+            "deadline": params.get("deadline"),
+            "is_primary": not state.goals,
+            "priority": len(state.goals) + 1,
+            "status": "active",
+            "currency": dict(state.currency),
+        }
+        return self._goal_view(state, state.goals[goal_id])
+
+    def goal_deposit(self, params: dict) -> dict:
+        state = self.user(params)
+        goal = self.goal(state, params)
+        try:
+            amount = float(params.get("amount"))
+        except (TypeError, ValueError):
+            raise RPCFault(422, "amount is invalid")
+        if amount <= 0:
+            raise RPCFault(422, "amount must be positive")
+        goal["amount_saved"] += amount
+        return self._goal_view(state, goal)
+
+    def goal_close(self, params: dict) -> dict:
+        state = self.user(params)
+        goal = self.goal(state, params)
+        goal["status"] = "closed"
+        return self._goal_view(state, goal)
+
+    def goal_reopen(self, params: dict) -> dict:
+        state = self.user(params)
+        goal = self.goal(state, params)
+        goal["status"] = "active"
+        return self._goal_view(state, goal)
+
+    def goal_set_primary(self, params: dict) -> dict:
+        state = self.user(params)
+        goal = self.goal(state, params)
+        for other in state.goals.values():
+            other["is_primary"] = other is goal
+        return self._goal_view(state, goal)
+
+    def _move_priority(self, params: dict, step: int) -> dict:
+        state = self.user(params)
+        goal = self.goal(state, params)
+        ordered = sorted(state.goals.values(), key=lambda item: item["priority"])
+        index = ordered.index(goal)
+        target = index + step
+        if 0 <= target < len(ordered):
+            ordered[index], ordered[target] = ordered[target], ordered[index]
+            for position, item in enumerate(ordered, start=1):
+                item["priority"] = position
+        return self._goal_view(state, goal)
+
+    def goal_priority_up(self, params: dict) -> dict:
+        return self._move_priority(params, -1)
+
+    def goal_priority_down(self, params: dict) -> dict:
+        return self._move_priority(params, 1)
+
+    # ---- budget / transactions ----
+
+    def _month_totals(self, state: UserState, month: str) -> tuple[float, float]:
+        income = expenses = 0.0
+        for item in state.transactions:
+            if str(item.get("datetime") or "").startswith(month):
+                amount = item["amount"]
+                if amount > 0:
+                    income += amount
+                else:
+                    expenses += -amount
+        return income, expenses
+
+    def budget_get_month(self, params: dict) -> dict:
+        state = self.user(params)
+        today = date.today()
+        month = params.get("month") or today.strftime("%Y-%m")
+        income, expenses = self._month_totals(state, month)
+        days_left = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+        return {
+            "month": month,
+            "income": income,
+            "expenses": expenses,
+            "recommended_daily_limit": round(max(income - expenses, 0) / days_left, 2),
+            "exists": income > 0,
+            "currency": state.currency,
+        }
+
+    def transaction_get_daily(self, params: dict) -> dict:
+        state = self.user(params)
+        day = params.get("date") or date.today().isoformat()
+        items = [item for item in state.transactions if str(item.get("datetime") or "").startswith(day)]
+        return {
+            "date": day,
+            "income": sum(item["amount"] for item in items if item["amount"] > 0),
+            "expense": sum(-item["amount"] for item in items if item["amount"] < 0),
+            "items": items,
+            "currency": state.currency,
+            "has_any_transactions": bool(state.transactions),
+        }
+
+    def transaction_import(self, params: dict) -> dict:
+        state = self.user(params)
+        imported = 0
+        for item in params.get("items") or []:
+            try:
+                amount = float(item.get("amount"))
+            except (TypeError, ValueError):
+                raise RPCFault(422, "amount is invalid")
+            state.transactions.append({
+                "amount": amount,
+                "category": item.get("category"),
+                "description": item.get("description"),
+                "datetime": item.get("datetime") or datetime.now().isoformat(timespec="seconds"),
+                "currency": state.currency,
+            })
+            imported += 1
+        return {"imported": imported}
+
+    def smart_save_run(self, params: dict) -> dict:
+        state = self.user(params)
+        goals = [goal for goal in state.goals.values() if goal["status"] == "active"]
+        if not goals:
+            return {"status": "no_goal"}
+        goal = next((item for item in goals if item["is_primary"]), goals[0])
+
+        if params.get("preview"):
+            budget = self.budget_get_month(params)
+            if not budget["exists"]:
+                return {"status": "no_budget"}
+            safe_save = math.floor(budget["recommended_daily_limit"] * 0.3)
+            if safe_save <= 0:
+                return {"status": "no_spare_money", "daily_limit": budget["recommended_daily_limit"]}
+            token = uuid.uuid4().hex
+            state.previews[token] = {"goal_id": goal["id"], "amount": safe_save}
+            return {
+                "status": "preview",
+                "goal": self._goal_view(state, goal),
+                "safe_save": safe_save,
+                "currency": state.currency,
+                "preview_token": token,
+            }
+
+        preview = state.previews.pop(params.get("preview_token") or "", None)
+        if preview is None:
+            return {"status": "already_saved"}
+        goal = state.goals.get(preview["goal_id"])
+        if goal is None or goal["status"] != "active":
+            return {"status": "goal_completed"}
+        goal["amount_saved"] += preview["amount"]
+        view = self._goal_view(state, goal)
+        return {
+            "status": "ok",
+            "goal": view,
+            "deposited": preview["amount"],
+            "goal_progress": view["progress"],
+            "currency": state.currency,
+        }
+
+    # ---- jobs ----
+
+    def job_submit(self, params: dict) -> dict:
+        method = params.get("method")
+        if method not in self._methods or str(method).startswith("job."):
+            raise RPCFault(-32601, "Method not found")
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = asyncio.create_task(self._run_job(method, params.get("params") or {}))
+        return {"job_id": job_id, "status": "pending"}
+
+    async def _run_job(self, method: str, params: dict):
+        self.calls[method] += 1
+        await self.delay(method)
+        if self.faults.rpc_error_rate and random.random() < self.faults.rpc_error_rate:
+            raise RPCFault(-32000, "Injected error")
+        return self._methods[method](params)
+
+    def job_get(self, params: dict) -> dict:
+        job_id = params.get("job_id")
+        task = self.jobs.get(job_id)
+        if task is None:
+            raise RPCFault(404, "Job not found")
+        if not task.done():
+            return {"job_id": job_id, "status": "running"}
+
+        del self.jobs[job_id]
+        fault = task.exception()
+        if isinstance(fault, RPCFault):
+            return {"job_id": job_id, "status": "failed", "error": {"code": fault.code, "message": fault.message}}
+        if fault is not None:
+            return {"job_id": job_id, "status": "failed", "error": {"code": -32603, "message": str(fault)}}
+        return {"job_id": job_id, "status": "done", "result": task.result()}
+
+    # ---- ai ----
+
+    def ai_transaction_analysis(self, params: dict) -> dict:
+        state = self.user(params)
+        days = params.get("days") or 7
+        spent = sum(-item["amount"] for item in state.transactions if item["amount"] < 0)
+        return {
+            "summary": f"За {days} дн. расходы составили {spent:.0f}.",
+            "recommendation": "Откладывайте фиксированную сумму сразу после дохода.",
+        }
+
+    def ai_insight_daily(self, params: dict) -> dict:
+        self.user(params)
+        return {"insight": "Сегодня хороший день, чтобы пополнить основную цель."}
+
+    def ai_goal_analysis(self, params: dict) -> dict:
+        state = self.user(params)
+        goal = self._goal_view(state, self.goal(state, params))
+        return {
+            "summary": f"Цель «{goal['title']}» выполнена на {goal['progress']}%.",
+            "recommendation": "Небольшие регулярные пополнения надёжнее редких крупных.",
+            "numbers": {"progress_percent": goal["progress"]},
+        }
+
+    # ---- currency ----
+
+    def currency_list(self, params: dict) -> dict:
+        self.user(params)
+        return {"data": CURRENCIES}
+
+    def currency_get(self, params: dict) -> dict:
+        return {"data": self.user(params).currency}
+
+    def currency_set(self, params: dict) -> dict:
+        state = self.user(params)
+        currency = _CURRENCY_BY_CODE.get(str(params.get("currency_code") or "").upper())
+        if currency is None:
+            raise RPCFault(422, "Unknown currency")
+        state.currency = dict(currency)
+        return {"data": state.currency}
+
+
+def _parse_latency(values: list[str]) -> tuple[float, dict[str, float]]:
+    median = 0.0
+    overrides: dict[str, float] = {}
+    for value in values:
+        if "=" in value:
+            prefix, ms = value.split("=", 1)
+            overrides[prefix] = float(ms)
+        else:
+            median = float(value)
+    return median, overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5136)
+    parser.add_argument("--token", default=None, help="require this bearer token (default: accept any)")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="median latency in ms, or PREFIX=MS for a method prefix (repeatable)",
+    )
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of HTTP 503 responses")
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0, help="share of JSON-RPC errors")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on 503")
+    parser.add_argument("--lost-response-rate", type=float, default=0.0, help="share of executed RPCs answered with 502")
+    parser.add_argument("--no-jobs", action="store_true", help="disable job.submit/job.get (legacy backend)")
+    parser.add_argument("--compress-min-bytes", type=int, default=1024, help="compress RPC responses from this size, 0 = never")
+    args = parser.parse_args()
+
+    median, overrides = _parse_latency(args.latency)
+    backend = FakeBackend(
+        latency=LatencyModel(median, args.sigma, overrides),
+        faults=FaultModel(args.error_rate, args.rpc_error_rate, args.retry_after, args.lost_response_rate),
+        token=args.token,
+        jobs=not args.no_jobs,
+        compress_min_bytes=args.compress_min_bytes,
+    )
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(backend.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+# tools/load_test.py
+"""
+Нагрузочный тест одного процесса бота: тот же Dispatcher и middleware, что в
+main.py, фейковая сессия Telegram и синтетические апдейты от N пользователей.
+
+Каждый пользователь проходит /start (язык, контакт, онбординг), создаёт цель,
+добавляет доход, затем --rounds раз выбирает сценарий: расход, «сегодня»,
+цели или умное накопление. В отчёте — updates/s, p50/p95/p99 обработки
+апдейта, запросы к бэкенду и вызовы Telegram API на апдейт.
+
+По умолчанию фейковый бэкенд (tools/fake_backend.py) поднимается в этом же
+процессе и делит с ботом event loop; для чистой цифры запустите его отдельно
+и передайте --backend-url.
+
+Запуск: python -m tools.load_test --users 2000 --concurrency 200 --latency 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, get_args
+
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Message, Update
+
+from tools.fake_backend import FakeBackend, FaultModel, LatencyModel, _parse_latency
+
+LOAD_TEST_BOT_TOKEN = "123456:LOAD-TEST"
+FIRST_USER_ID = 7_000_000_000
+
+# Сценарии после регистрации и их веса.
+FLOW_WEIGHTS = {
+    "expense": 4,
+    "today": 3,
+    "goals": 2,
+    "smart": 1,
+}
+
+
+class FakeTelegramSession(BaseSession):
+    """
+    Сессия Bot без сети: считает вызовы Telegram API и отвечает правдоподобными
+    объектами (Message для send/edit, True для остального). Скачивание
+    файлов не моделируется: stream_content отдаёт пустой поток.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self.last_message: dict[int, int] = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = json.dumps({"ok": True, "result": self._result(method)})
+        response = self.check_response(bot=bot, method=method, status_code=200, content=content)
+        return response.result
+
+    def _result(self, method) -> Any:
+        returning = method.__returning__
+        if returning is not Message and Message not in get_args(returning):
+            return True
+
+        chat_id = getattr(method, "chat_id", None) or 0
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        self.last_message[chat_id] = message_id
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": getattr(method, "text", None) or "",
+        }
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        self.calls["stream_content"] += 1
+        for chunk in ():
+            yield chunk
+
+
+class VirtualUser:
+    """
+    Один синтетический пользователь: собирает апдейты от своего имени и
+    прогоняет их через dp.feed_update, замеряя время обработки.
+    """
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, runner: "LoadRunner", user_id: int):
+        self.runner = runner
+        self.user_id = user_id
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"Load {user_id}", "language_code": "ru"}
+        self.chat = {"id": user_id, "type": "private"}
+
+    def _message(self, **fields) -> dict:
+        return {
+            "message_id": next(self.runner.session._message_ids),
+            "date": int(time.time()),
+            "chat": self.chat,
+            "from": self.user,
+            **fields,
+        }
+
+    async def text(self, flow: str, text: str):
+        await self._feed(flow, {"message": self._message(text=text)})
+
+    async def contact(self, flow: str):
+        contact = {"phone_number": f"+998{self.user_id % 10**9:09d}", "first_name": "Load", "user_id": self.user_id}
+        await self._feed(flow, {"message": self._message(contact=contact)})
+
+    async def press(self, flow: str, data: str):
+        message_id = self.runner.session.last_message.get(self.user_id) or next(self.runner.session._message_ids)
+        callback = {
+            "id": str(next(self._update_ids)),
+            "from": self.user,
+            "chat_instance": str(self.user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": self.chat,
+                "from": self.runner.bot_user,
+                "text": "…",
+            },
+        }
+        await self._feed(flow, {"callback_query": callback})
+
+    async def _feed(self, flow: str, payload: dict):
+        runner = self.runner
+        update = Update.model_validate({"update_id": next(self._update_ids), **payload}, context={"bot": runner.bot})
+        started = time.perf_counter()
+        try:
+            await runner.dp.feed_update(runner.bot, update)
+        except Exception:
+            runner.errors[flow] += 1
+            logging.debug("Update failed in flow %s", flow, exc_info=True)
+        runner.latencies[flow].append(time.perf_counter() - started)
+        if runner.think_time:
+            await asyncio.sleep(random.expovariate(1 / runner.think_time))
+
+    # ---- сценарии ----
+
+    async def start(self):
+        await self.text("start", "/start")
+        await self.press("start", "lang_start_ru")
+        await self.contact("start")
+        await self.press("start", "onb_skip")
+
+    async def create_goal(self):
+        await self.press("goal_create", "menu_newgoal")
+        await self.text("goal_create", "Отпуск")
+        await self.text("goal_create", "5000000")
+        await self.press("goal_create", "deadline_none")
+
+    async def income(self):
+        from utils.categories import INCOME_CATEGORY_KEYS
+
+        await self.press("income", "menu_add_income")
+        await self.text("income", "3000000")
+        await self.press("income", f"inc_{INCOME_CATEGORY_KEYS[0]}")
+        await self.press("income", "inc_desc_skip")
+        await self.press("income", "inc_date_today")
+        await self.press("income", "income_confirm")
+
+    async def expense(self):
+        from utils.categories import EXPENSE_CATEGORY_KEYS
+
+        await self.press("expense", "menu_add_transaction")
+        await self.text("expense", str(random.randint(5, 200) * 1000))
+        await self.press("expense", f"cat_{random.choice(EXPENSE_CATEGORY_KEYS)}")
+        await self.press("expense", "desc_skip")
+        await self.press("expense", "date_today")
+        await self.press("expense", "expense_confirm")
+
+    async def today(self):
+        await self.press("today", "menu_today")
+
+    async def goals(self):
+        await self.press("goals", "menu_goals")
+
+    async def smart(self):
+        await self.press("smart", "menu_smart")
+        await self.press("smart", "smart_confirm")
+
+    async def run(self, rounds: int):
+        await self.start()
+        await self.create_goal()
+        await self.income()
+        flows = list(FLOW_WEIGHTS)
+        weights = list(FLOW_WEIGHTS.values())
+        for flow in random.choices(flows, weights, k=rounds):
+            await getattr(self, flow)()
+
+
+class LoadRunner:
+    def __init__(self, dp, bot, session: FakeTelegramSession, think_time: float):
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.bot_user = {"id": bot.id, "is_bot": True, "first_name": "Bot"}
+        self.think_time = think_time
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def run(self, users: int, concurrency: int, rounds: int) -> float:
+        limiter = asyncio.Semaphore(concurrency)
+
+        async def walk(user_id: int):
+            async with limiter:
+                await VirtualUser(self, user_id).run(rounds)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(walk(FIRST_USER_ID + index) for index in range(users)))
+        return time.perf_counter() - started
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _isolate_stores(directory: Path) -> None:
+    # Хранилища пишут в data/; тест не должен трогать рабочие файлы.
+    from storage.currency_store import store as currency_store
+    from storage.language_store import store as language_store
+    from storage.outbox_store import store as outbox_store
+    from storage.registration_store import store as registration_store
+
+    for store in (currency_store, language_store, registration_store):
+        store.path = directory / store.path.name
+        store._data = {}
+    outbox_store.path = directory / outbox_store.path.name
+
+
+async def _backend_calls(backend: FakeBackend | None, url: str) -> Counter[str]:
+    if backend is not None:
+        return Counter(backend.calls)
+    import httpx
+
+    stats_url = url.rsplit("/api", 1)[0] + "/stats"
+    async with httpx.AsyncClient() as client:
+        response = await client.get(stats_url)
+    return Counter(response.json().get("calls", {}))
+
+
+def report(runner: LoadRunner, elapsed: float, users: int, http_requests: int, calls: Counter[str]):
+    all_latencies = sorted(value for values in runner.latencies.values() for value in values)
+    updates = len(all_latencies)
+    methods = sum(count for name, count in calls.items() if name != "rpc.batch")
+    telegram_calls = sum(runner.session.calls.values())
+
+    print(f"\nusers: {users}, updates: {updates}, elapsed: {elapsed:.2f}s")
+    print(f"throughput: {updates / elapsed:.1f} updates/s")
+    print(
+        "latency: p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms".format(
+            *(percentile(all_latencies, q) * 1000 for q in (0.5, 0.95, 0.99))
+        )
+    )
+    print(f"backend HTTP requests per update: {http_requests / max(updates, 1):.2f}")
+    print(f"backend RPC methods per update:   {methods / max(updates, 1):.2f}")
+    print(f"Telegram API calls per update:    {telegram_calls / max(updates, 1):.2f}")
+
+    print(f"\n  {'flow':<12} {'updates':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for flow, values in runner.latencies.items():
+        values = sorted(values)
+        print(
+            f"  {flow:<12} {len(values):>8} {runner.errors[flow]:>7} "
+            + " ".join(f"{percentile(values, q) * 1000:>8.1f}" for q in (0.5, 0.95, 0.99))
+        )
+
+    print("\n  backend calls:  " + ", ".join(f"{name}={count}" for name, count in calls.most_common()))
+    print("  telegram calls: " + ", ".join(f"{name}={count}" for name, count in runner.session.calls.most_common()))
+
+
+async def run(args) -> None:
+    backend = None
+    backend_runner = None
+    if args.backend_url:
+        os.environ["BACKEND_BASE_URL"] = args.backend_url
+    else:
+        from aiohttp import web
+
+        median, overrides = _parse_latency(args.latency)
+        backend = FakeBackend(
+            latency=LatencyModel(median, args.sigma, overrides),
+            faults=FaultModel(args.error_rate, args.rpc_error_rate, lost_response_rate=args.lost_response_rate),
+        )
+        port = _free_port()
+        backend_runner = web.AppRunner(backend.app(), access_log=None)
+        await backend_runner.setup()
+        await web.TCPSite(backend_runner, "127.0.0.1", port).start()
+        os.environ["BACKEND_BASE_URL"] = f"http://127.0.0.1:{port}/api"
+    os.environ.setdefault("RPC_TOKEN", "load-test")
+    # Синтетические пользователи жмут кнопки без пауз, лимиты на пользователя их бы душили.
+    os.environ.setdefault("RPC_USER_RATE", "0")
+    os.environ.setdefault("THROTTLE_MESSAGE_RATE", "0")
+    os.environ.setdefault("THROTTLE_CALLBACK_RATE", "0")
+
+    # config читает окружение при импорте, поэтому модули бота — только здесь.
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+
+    from config import BACKEND_BASE_URL
+    from main import build_dispatcher
+    from rpc import close_http_client, http_pool_stats
+    from storage.outbox_store import store as outbox_store
+    from utils.timing import TelegramTimingMiddleware
+
+    session = FakeTelegramSession(latency=args.telegram_latency / 1000)
+    bot = Bot(token=LOAD_TEST_BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+    bot.session.middleware(TelegramTimingMiddleware())
+    runner = LoadRunner(build_dispatcher(), bot, session, think_time=args.think_time / 1000)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as directory:
+        _isolate_stores(Path(directory))
+        calls_before = await _backend_calls(backend, BACKEND_BASE_URL)
+        requests_before = http_pool_stats()["requests"]
+        try:
+            elapsed = await runner.run(args.users, args.concurrency, args.rounds)
+            http_requests = http_pool_stats()["requests"] - requests_before
+            calls = await _backend_calls(backend, BACKEND_BASE_URL)
+            calls.subtract(calls_before)
+            report(runner, elapsed, args.users, http_requests, +calls)
+        finally:
+            await outbox_store.close()
+            await close_http_client()
+            if backend_runner is not None:
+                await backend_runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="synthetic users")
+    parser.add_argument("--concurrency", type=int, default=100, help="users walking flows at the same time")
+    parser.add_argument("--rounds", type=int, default=5, help="flows per user after registration")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between user actions, ms")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="Telegram API latency, ms")
+    parser.add_argument("--backend-url", default=None, help="external backend (default: embedded fake backend)")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="embedded backend median latency in ms, or PREFIX=MS (repeatable)",
+    )
+    parser.add_argument("--sigma", type=float, default=0.5, help="embedded backend latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="embedded backend share of HTTP 503")
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0, help="embedded backend share of RPC errors")
+    parser.add_argument(
+        "--lost-response-rate",
+        type=float,
+        default=0.0,
+        help="embedded backend share of executed RPCs answered with 502",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log failed updates")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
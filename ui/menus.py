@@ -1,4 +1,4 @@
-from rpc import rpc, RPCError, RPCTransportError
+from rpc import rpc_batch, RPCError, RPCTransportError
 from keyboards.keyboards import main_menu
 from utils.dates import current_month, today_iso
 
@@ -26,39 +26,37 @@ async def get_user_flags(tg_user_id: int, bootstrap: dict | None = None) -> dict
     bootstrap_has_budget = _bool_from_payload(bootstrap, "has_budget_this_month", "has_budget")
 
     try:
-        goals = await rpc("goal.list", {"tg_user_id": tg_user_id})
-        flags["has_goals"] = bootstrap_has_goals if bootstrap_has_goals is not None else bool(goals.get("goals", []))
-    except (RPCError, RPCTransportError):
+        goals, budget, daily = await rpc_batch([
+            ("goal.list", {"tg_user_id": tg_user_id}),
+            ("budget.getMonth", {
+                "tg_user_id": tg_user_id,
+                "month": current_month(),
+            }),
+            ("transaction.getDaily", {
+                "tg_user_id": tg_user_id,
+                "date": today_iso(),
+            }),
+        ])
+    except RPCTransportError:
         return flags
 
-    try:
-        budget = await rpc("budget.getMonth", {
-            "tg_user_id": tg_user_id,
-            "month": current_month(),
-        })
-        if bootstrap_has_budget is not None:
-            flags["has_budget"] = bootstrap_has_budget
-        else:
-            flags["has_budget"] = bool(budget.get("exists", True))
-    except (RPCError, RPCTransportError):
+    if isinstance(goals, RPCError):
+        return flags
+    flags["has_goals"] = bootstrap_has_goals if bootstrap_has_goals is not None else bool(goals)
+
+    if isinstance(budget, RPCError):
         flags["has_budget"] = True
+    elif bootstrap_has_budget is not None:
+        flags["has_budget"] = bootstrap_has_budget
+    else:
+        flags["has_budget"] = budget.exists
 
-    try:
-        daily = await rpc("transaction.getDaily", {
-            "tg_user_id": tg_user_id,
-            "date": today_iso(),
-        })
-        if bootstrap_has_transactions is not None:
-            flags["has_transactions"] = bootstrap_has_transactions
-        else:
-            flags["has_transactions"] = bool(
-                daily.get("has_any_transactions")
-                or daily.get("total_transactions_count")
-                or daily.get("transactions_count_all_time")
-                or daily.get("items", [])
-            )
-    except (RPCError, RPCTransportError):
+    if isinstance(daily, RPCError):
         flags["has_transactions"] = True
+    elif bootstrap_has_transactions is not None:
+        flags["has_transactions"] = bootstrap_has_transactions
+    else:
+        flags["has_transactions"] = daily.has_any_transactions
 
     flags["smart_save_available"] = flags["has_goals"] and flags["has_budget"]
     if bootstrap_is_first_run is not None:
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Coroutine
+
+from utils.deadline import deadline
+from utils.metrics import REGISTRY
+
+# Ссылки на запущенные задачи: без них asyncio может собрать задачу сборщиком мусора.
+_TASKS: set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine[Any, Any, Any], name: str | None = None) -> asyncio.Task:
+    """
+    Запускает работу вне обработки апдейта: без его дедлайна, с логированием
+    необработанных ошибок.
+    """
+    task = asyncio.create_task(_detached(coro), name=name)
+    _TASKS.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+async def _detached(coro: Coroutine[Any, Any, Any]) -> Any:
+    with deadline(None):
+        return await coro
+
+
+def _finished(task: asyncio.Task) -> None:
+    _TASKS.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logging.error("Background task %s failed", task.get_name(), exc_info=exc)
+
+
+@REGISTRY.collector
+def _collect_background_metrics():
+    yield "bot_background_tasks", "gauge", "Background tasks in progress.", [({}, len(_TASKS))]
+
+
+async def cancel_all() -> None:
+    """
+    Отменяет незавершённые задачи — при остановке бота.
+    """
+    tasks = list(_TASKS)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
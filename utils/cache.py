@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class UserTTLCache:
+    """
+    LRU-кэш ответов бэкенда с TTL, разбитый по пользователям.
+
+    Вытесняются давно не использованные пользователи целиком, внутри
+    пользователя число записей ограничено max_entries_per_user.
+    Счётчик поколений не даёт запросу, начатому до инвалидации,
+    положить в кэш устаревший ответ.
+    """
+
+    def __init__(self, ttl: float, max_users: int = 10000, max_entries_per_user: int = 32):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_entries_per_user = max_entries_per_user
+        self._users: OrderedDict[Hashable, OrderedDict[Hashable, tuple[float, Any]]] = OrderedDict()
+        self._generations: dict[Hashable, int] = {}
+        self._counter = itertools.count(1)
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user: Hashable, key: Hashable) -> tuple[bool, Any]:
+        entries = self._users.get(user)
+        if entries is not None:
+            item = entries.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    entries.move_to_end(key)
+                    self._users.move_to_end(user)
+                    self.hits += 1
+                    return True, value
+                del entries[key]
+        self.misses += 1
+        return False, None
+
+    def generation(self, user: Hashable) -> int:
+        return self._generations.get(user, self._floor)
+
+    def set(self, user: Hashable, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if self.ttl <= 0:
+            return
+        if generation is not None and generation != self.generation(user):
+            return
+
+        entries = self._users.get(user)
+        if entries is None:
+            entries = OrderedDict()
+            self._users[user] = entries
+        else:
+            self._users.move_to_end(user)
+
+        entries[key] = (time.monotonic() + self.ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries_per_user:
+            entries.popitem(last=False)
+
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user: Hashable, prefixes: tuple[str, ...] | None = None) -> None:
+        """
+        Сбрасывает записи пользователя, ключ которых (кортеж с именем метода
+        первым элементом) начинается с одного из prefixes; None — все записи.
+        """
+        if len(self._generations) >= self.max_users:
+            # Сдвиг общего поколения: все начатые запросы просто не попадут в кэш.
+            self._generations.clear()
+            self._floor = next(self._counter)
+        self._generations[user] = next(self._counter)
+        entries = self._users.get(user)
+        if not entries:
+            return
+        if prefixes is None:
+            del self._users[user]
+            return
+        for key in [k for k in entries if str(k[0]).startswith(prefixes)]:
+            del entries[key]
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._generations.clear()
+        self._floor = next(self._counter)
+
+
+class NegativeCache:
+    """
+    Недавние неудачи по ключу. После threshold неудач подряд ключ
+    пропускается base * 2**k секунд (k растёт с каждой новой неудачей),
+    но не дольше max_delay; успех сбрасывает ключ. Неудачи, пришедшие,
+    пока ключ уже пропускается, паузу не удлиняют.
+    """
+
+    def __init__(self, base: float, max_delay: float, threshold: int = 1, max_keys: int = 10000):
+        self.base = base
+        self.max_delay = max_delay
+        self.threshold = max(threshold, 1)
+        self.max_keys = max_keys
+        self._entries: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def retry_in(self, key: Hashable) -> float:
+        """
+        Сколько секунд ещё пропускать ключ; 0 — можно пробовать.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[1] - time.monotonic())
+
+    def failed(self, key: Hashable) -> None:
+        if self.base <= 0 or self.retry_in(key) > 0:
+            return
+        failures = self._entries.get(key, (0, 0.0))[0] + 1
+        until = 0.0
+        if failures >= self.threshold:
+            delay = min(self.base * 2 ** (failures - self.threshold), self.max_delay)
+            until = time.monotonic() + delay
+        self._entries[key] = (failures, until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def succeeded(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для одного бэкенд-эндпоинта.
+
+    closed — запросы идут, исходы последних window вызовов копятся;
+    при доле ошибок >= failure_rate (и хотя бы min_calls вызовах) переходит в open.
+    open — запросы отклоняются сразу, пока не пройдёт cooldown.
+    half_open — пропускается не больше half_open_probes пробных запросов:
+    успех закрывает цепь, ошибка снова открывает.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 15.0,
+        half_open_probes: int = 1,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_started_at = 0.0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+
+        if self.state == HALF_OPEN:
+            # Пробный запрос мог быть отменён и не вернуть исход — через cooldown пускаем новый.
+            if self._probes >= self.half_open_probes and now - self._probe_started_at < self.cooldown:
+                return False
+            if self._probes >= self.half_open_probes:
+                self._probes = 0
+            self._probes += 1
+            self._probe_started_at = now
+
+        return True
+
+    def rejects(self) -> bool:
+        """
+        allow() сейчас отказал бы. В отличие от allow(), не занимает пробный запрос.
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            return now - self._opened_at < self.cooldown
+        if self.state == HALF_OPEN:
+            return self._probes >= self.half_open_probes and now - self._probe_started_at < self.cooldown
+        return False
+
+    def record(self, ok: bool) -> None:
+        if self.state == HALF_OPEN:
+            if ok:
+                self._reset()
+            else:
+                self._open()
+            return
+
+        if self.state == OPEN:
+            return
+
+        if len(self._outcomes) == self._outcomes.maxlen and not self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(ok)
+        if not ok:
+            self._failures += 1
+
+        if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+
+    def _reset(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._probes = 0
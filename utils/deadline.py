@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Момент (time.monotonic), к которому обработка текущего апдейта должна уложиться.
+_DEADLINE: ContextVar[float | None] = ContextVar("update_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """
+    Сколько секунд осталось до дедлайна; None — дедлайн не задан.
+    """
+    expires_at = _DEADLINE.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """
+    Задаёт дедлайн на время блока; None снимает его (например, для фоновой
+    работы после того, как callback уже отвечен).
+    """
+    token = _DEADLINE.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него работает stdlib json
+    orjson = None
+
+
+class JsonCodec:
+    """
+    Кодек JSON для обмена с бэкендом: dumps отдаёт bytes, loads принимает bytes/str.
+    Ошибки разбора — ValueError, как у stdlib json.
+    """
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes | str], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+STDLIB_CODEC = JsonCodec("json", _stdlib_dumps, json.loads)
+
+if orjson is not None:
+    ORJSON_CODEC: JsonCodec | None = JsonCodec(
+        "orjson",
+        lambda obj: orjson.dumps(obj, default=str),
+        orjson.loads,
+    )
+else:
+    ORJSON_CODEC = None
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """
+    auto — orjson, если установлен, иначе stdlib; json — всегда stdlib.
+    """
+    name = (name or "auto").lower()
+    if name == "json":
+        return STDLIB_CODEC
+    if ORJSON_CODEC is not None:
+        return ORJSON_CODEC
+    if name == "orjson":
+        logging.warning("orjson codec requested but orjson is not installed; using stdlib json")
+    return STDLIB_CODEC
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from collections import deque
+
+
+class LatencyWindow:
+    """
+    Скользящее окно последних задержек для оценки перцентилей.
+    Отсортированная копия пересчитывается не чаще, чем раз в refresh_every замеров.
+    """
+
+    def __init__(self, size: int = 200, refresh_every: int = 20):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._refresh_every = refresh_every
+        self._sorted: list[float] = []
+        self._pending = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, value: float) -> None:
+        self._samples.append(value)
+        self._pending += 1
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        if self._pending >= self._refresh_every or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._pending = 0
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Hashable
+
+
+class LimiterFull(Exception):
+    """
+    Очередь ограничителя переполнена — вызов отклонён без ожидания.
+    """
+
+
+class ConcurrencyLimiter:
+    """
+    Не больше limit одновременных вызовов; остальные ждут в очереди
+    длиной до max_queue, сверх неё — LimiterFull сразу (load shedding).
+    limit <= 0 — без ограничения.
+    """
+
+    def __init__(self, limit: int, max_queue: int = 0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_use = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+
+    @asynccontextmanager
+    async def slot(self, timeout: float | None = None):
+        """
+        Занимает место на время блока. Не дождались за timeout — asyncio.TimeoutError.
+        """
+        semaphore = self._semaphore
+        if semaphore is None:
+            yield
+            return
+
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                raise LimiterFull()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout)
+            finally:
+                self.waiting -= 1
+        else:
+            # Свободное место занимается без переключения задачи.
+            await semaphore.acquire()
+
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            semaphore.release()
+
+
+    @asynccontextmanager
+    async def try_slot(self):
+        """
+        Как slot, но без ожидания: если свободного места нет, блок получает
+        False и выполняется без места.
+        """
+        semaphore = self._semaphore
+        if semaphore is None:
+            yield True
+            return
+        if semaphore.locked():
+            yield False
+            return
+
+        # Свободное место занимается без переключения задачи.
+        await semaphore.acquire()
+        self.in_use += 1
+        try:
+            yield True
+        finally:
+            self.in_use -= 1
+            semaphore.release()
+
+
+class TokenBucket:
+    """
+    Ведро на burst жетонов, пополняется со скоростью rate жетонов в секунду.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait: float | None = None) -> float | None:
+        """
+        Забирает жетон и возвращает, сколько секунд подождать до него.
+        Если ждать дольше max_wait — жетон не берётся, возвращается None.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if max_wait is not None and wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+class KeyedRateLimiter:
+    """
+    Отдельное TokenBucket на каждый ключ (пользователя).
+    Хранит не больше max_keys вёдер, давно не использованные вытесняются.
+    Ведро, простоявшее idle секунд (по умолчанию — время полного пополнения),
+    снова полное и ничем не отличается от нового, поэтому удаляется.
+    Вёдра лежат в порядке использования, так что любая операция — O(1).
+    rate <= 0 — без ограничения.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000, idle: float | None = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle = idle if idle is not None else (max(burst, 1.0) / rate if rate > 0 else 0.0)
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def reserve(self, key: Hashable, max_wait: float | None = None) -> float | None:
+        if self.rate <= 0:
+            return 0.0
+        self._evict_idle()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.reserve(max_wait)
+
+    def _evict_idle(self) -> None:
+        # Старейшее ведро всегда в начале; за вызов удаляется не больше пары штук.
+        expired = time.monotonic() - self.idle
+        for _ in range(2):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.updated > expired:
+                return
+            del self._buckets[key]
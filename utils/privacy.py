@@ -42,7 +42,11 @@ def sanitize_log_value(value: Any) -> Any:
     if isinstance(value, tuple):
         return tuple(sanitize_log_value(v) for v in value)
 
-    text = str(value)
+    # Числа не могут содержать токен — не тратим время на str().
+    if isinstance(value, (bool, int, float)):
+        return value
+
+    text = value if isinstance(value, str) else str(value)
     lowered = text.lower()
 
     if "token" in lowered or "secret" in lowered:
@@ -69,3 +73,22 @@ def sanitize_log_payload(payload: dict[str, Any] | None) -> dict[str, Any]:
             safe[key] = sanitize_log_value(value)
 
     return safe
+
+
+class LazySafePayload:
+    """
+    Обёртка для логов: payload маскируется только когда запись
+    действительно форматируется (logging вызывает str() лениво).
+    """
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: dict[str, Any] | list[dict[str, Any]] | None):
+        self.payload = payload
+
+    def __str__(self) -> str:
+        if isinstance(self.payload, list):
+            return str([sanitize_log_payload(item) for item in self.payload])
+        return str(sanitize_log_payload(self.payload))
+
+    __repr__ = __str__
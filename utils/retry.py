@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Retry-After в секундах: число секунд либо HTTP-дата.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Политика повторов: число попыток, decorrelated jitter между ними
+    и общий бюджет повторов.
+
+    Бюджет — ведро жетонов: каждый вызов добавляет budget_ratio жетона,
+    каждый повтор забирает один, плюс min_retries_per_second на случай
+    низкого трафика. Так при деградации бэкенда повторов не больше
+    заданной доли от всех вызовов и все пользователи не ретраят разом.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 2,
+        base_delay: float = 0.2,
+        max_delay: float = 3.0,
+        budget_ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        max_retry_after: float = 5.0,
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_retry_after = max_retry_after
+        self._capacity = max(10.0, min_retries_per_second * 10)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def record_call(self) -> None:
+        self.calls += 1
+        self._refill(self.budget_ratio)
+
+    def next_delay(self, previous: float, retry_after: float | None = None) -> float | None:
+        """
+        Пауза перед следующей попыткой или None, если сервер просит ждать
+        дольше max_retry_after. Бюджет не тратит — для этого acquire().
+        """
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def acquire(self) -> bool:
+        """
+        Забирает жетон на повтор; False — бюджет исчерпан, повторять нельзя.
+        Вызывать, когда повтор точно будет (например, дедлайн его вмещает).
+        """
+        self._refill(0.0)
+        if self._tokens < 1.0:
+            self.budget_exhausted += 1
+            return False
+        self._tokens -= 1.0
+        self.retries += 1
+        return True
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        amount += (now - self._updated_at) * self.min_retries_per_second
+        self._updated_at = now
+        self._tokens = min(self._capacity, self._tokens + amount)
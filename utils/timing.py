@@ -0,0 +1,143 @@
+"""
+Время обработки апдейта по стадиям: middleware, хендлер, вызовы Telegram API
+и бэкенда. Гистограммы лежат в REGISTRY рядом с метриками RPC, а апдейт
+дольше SLOW_UPDATE_THRESHOLD пишется в лог одной строкой с разбивкой.
+Время rpc и telegram входит и во время middleware/хендлера, их вызвавшего.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextvars import ContextVar
+
+from aiogram import BaseMiddleware, types
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from config import SLOW_UPDATE_THRESHOLD
+from utils.metrics import REGISTRY
+
+_UPDATE_SECONDS = REGISTRY.histogram("update_seconds", "Total update processing time.", ("event",))
+_STAGE_SECONDS = REGISTRY.histogram(
+    "update_stage_seconds",
+    "Time spent in a middleware (own time), handler or Telegram API call.",
+    ("stage", "name"),
+)
+
+# Разбивка текущего апдейта: (stage, name) -> секунды.
+_BREAKDOWN: ContextVar[dict[tuple[str, str], float] | None] = ContextVar("update_breakdown", default=None)
+
+
+def add(stage: str, name: str, seconds: float) -> None:
+    """
+    Добавляет время к разбивке текущего апдейта (без гистограммы).
+    """
+    breakdown = _BREAKDOWN.get()
+    if breakdown is not None:
+        key = (stage, name)
+        breakdown[key] = breakdown.get(key, 0.0) + seconds
+
+
+def observe(stage: str, name: str, seconds: float) -> None:
+    _STAGE_SECONDS.observe(seconds, stage, name)
+    add(stage, name, seconds)
+
+
+def _describe(update: types.Update) -> str:
+    if update.callback_query is not None:
+        return f"callback data={update.callback_query.data}"
+    if update.message is not None:
+        text = update.message.text or ""
+        return f"message {text.split(maxsplit=1)[0] if text.startswith('/') else 'text'}"
+    return update.event_type
+
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """
+    Внешний middleware на dp.update: полное время апдейта и строка
+    «Slow update» в лог, если оно больше threshold (0 — не писать).
+    """
+
+    def __init__(self, threshold: float = SLOW_UPDATE_THRESHOLD):
+        self.threshold = threshold
+
+    async def __call__(self, handler, event, data):
+        breakdown: dict[tuple[str, str], float] = {}
+        token = _BREAKDOWN.set(breakdown)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            _BREAKDOWN.reset(token)
+            _UPDATE_SECONDS.observe(elapsed, event.event_type)
+            if self.threshold > 0 and elapsed >= self.threshold:
+                stages = " ".join(
+                    f"{stage}:{name}={seconds * 1000:.0f}ms"
+                    for (stage, name), seconds in sorted(breakdown.items(), key=lambda item: -item[1])
+                    if seconds >= 0.001
+                )
+                logging.warning(
+                    "Slow update %.0fms %s user=%s %s",
+                    elapsed * 1000,
+                    _describe(event),
+                    getattr(data.get("event_from_user"), "id", None),
+                    stages,
+                )
+
+
+class TimedMiddleware(BaseMiddleware):
+    """
+    Обёртка над middleware: считает его собственное время, без того,
+    что выполнялось дальше по цепочке.
+    """
+
+    def __init__(self, middleware: BaseMiddleware):
+        self.middleware = middleware
+        self.name = type(middleware).__name__
+
+    async def __call__(self, handler, event, data):
+        inner = 0.0
+
+        async def timed_handler(event, data):
+            nonlocal inner
+            started = time.perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                inner += time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            return await self.middleware(timed_handler, event, data)
+        finally:
+            observe("middleware", self.name, time.perf_counter() - started - inner)
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """
+    Самый внутренний middleware: время хендлера, который прошёл фильтры.
+    Хендлер называется модулем своего роутера и именем функции.
+    """
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        name = f"{callback.__module__}.{callback.__name__}" if callback is not None else "unknown"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            observe("handler", name, time.perf_counter() - started)
+
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    """
+    Время вызовов Telegram API по методам; ставится на bot.session.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            observe("telegram", type(method).__name__, time.perf_counter() - started)
@@ -5,6 +5,8 @@ from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Optional
 
+from models import Currency
+
 
 DEFAULT_CURRENCY = {
     "code": "UZS",
@@ -56,7 +58,9 @@ def safe_html_text(text, max_len: int | None = None) -> str:
     return escape_html(clean_text(text, max_len or 10000))
 
 
-def normalize_currency(currency: dict | None) -> dict:
+def normalize_currency(currency: dict | Currency | None) -> dict:
+    if isinstance(currency, Currency):
+        currency = currency.as_dict()
     merged = dict(DEFAULT_CURRENCY)
     if isinstance(currency, dict):
         merged.update({k: v for k, v in currency.items() if v not in (None, "")})